@@ -1,11 +1,28 @@
 import discord
 import os
 import asyncio
+import hashlib
+import hmac
+import json
 import logging
-import sqlite3
+import math
+import threading
+import time
+from discord import app_commands
 from discord.ext import commands
 from aiohttp import web
 import config
+from utils.checks import NotInGameChannel
+from utils.guild_settings import GuildSettingsCache
+from utils.members import MemberResolver
+from utils.metrics import COMMAND_LATENCY, REGISTRY, executor_queue_depth
+from utils.outbox import Outbox
+from utils.profiling import LoopWatchdog, format_collapsed, sample_stacks
+from utils.response_cache import ResponseCache
+from utils.settings_db import SettingsDatabase
+from utils.stats_export import CONTENT_TYPES, FORMATS, stream_export
+from utils.stats_store import EXPORT_COLUMNS, StatsStore
+from utils.tournament_journal import TournamentJournal
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s:%(levelname)s:%(name)s: %(message)s')
@@ -13,90 +30,463 @@ logger = logging.getLogger('discord')
 
 # --- Web Server Setup ---
 async def health_check(request):
+    """Liveness: the process is up and its event loop is serving requests."""
     return web.Response(text="Bot is running")
 
-async def run_web_server():
+async def readiness_check(request):
+    """Readiness: connected to the gateway with every store open. 503 otherwise."""
+    bot = request.app['bot']
+    checks = bot.readiness()
+    status = 200 if all(checks.values()) else 503
+    return web.json_response({'ready': status == 200, 'checks': checks}, status=status)
+
+async def metrics_endpoint(request):
+    """Prometheus text exposition of the bot's metrics."""
+    return web.Response(text=REGISTRY.render(), content_type='text/plain', charset='utf-8',
+                        headers={'X-Content-Type-Options': 'nosniff'})
+
+def is_admin_request(request) -> bool:
+    """True if the request carries the configured admin bearer token."""
+    if not config.ADMIN_API_TOKEN:
+        return False
+    supplied = request.headers.get('Authorization', '')
+    return hmac.compare_digest(supplied.encode('utf-8'), f'Bearer {config.ADMIN_API_TOKEN}'.encode('utf-8'))
+
+async def profile_endpoint(request):
+    """Admin only: samples the event loop thread for ?seconds= and returns collapsed stacks."""
+    if not config.ADMIN_API_TOKEN:
+        raise web.HTTPNotFound()
+    if not is_admin_request(request):
+        raise web.HTTPUnauthorized(headers={'WWW-Authenticate': 'Bearer'})
+    try:
+        seconds = float(request.query.get('seconds', 5))
+        interval = float(request.query.get('interval_ms', 5)) / 1000
+    except ValueError:
+        raise web.HTTPBadRequest(text='seconds and interval_ms must be numbers')
+    seconds = min(max(seconds, 0.1), config.PROFILE_MAX_SECONDS)
+    interval = min(max(interval, 0.001), 1.0)
+    lock = request.app['profile_lock']
+    if lock.locked():
+        raise web.HTTPConflict(text='A profile is already being captured')
+    async with lock:
+        # This handler runs on the loop thread, which is the one worth sampling
+        loop_thread_id = threading.get_ident()
+        counts = await asyncio.to_thread(sample_stacks, loop_thread_id, seconds, interval)
+    logger.info(f"Captured a {seconds:.1f}s profile with {sum(counts.values())} samples")
+    return web.Response(text=format_collapsed(counts), content_type='text/plain', charset='utf-8')
+
+async def export_endpoint(request):
+    """Admin only: streams players, guilds, snapshot or duels as ?format=csv (default) or ndjson."""
+    if not config.ADMIN_API_TOKEN:
+        raise web.HTTPNotFound()
+    if not is_admin_request(request):
+        raise web.HTTPUnauthorized(headers={'WWW-Authenticate': 'Bearer'})
+    kind = request.match_info['kind']
+    fmt = request.query.get('format', 'csv')
+    if kind not in EXPORT_COLUMNS or fmt not in FORMATS:
+        raise web.HTTPNotFound()
+    response = web.StreamResponse(headers={
+        'Content-Type': f'{CONTENT_TYPES[fmt]}; charset=utf-8',
+        'Content-Disposition': f'attachment; filename="{kind}.{fmt}"',
+    })
+    response.enable_chunked_encoding()
+    await response.prepare(request)
+    # One page at a time, so memory stays flat however many players there are
+    async for chunk in stream_export(request.app['bot'].stats_store, kind, fmt):
+        await response.write(chunk.encode('utf-8'))
+    await response.write_eof()
+    return response
+
+# --- Public stats API ---
+# Served from the in-memory rankings and caches; never calls Discord. IDs are
+# strings because Discord snowflakes overflow JavaScript numbers.
+def parse_snowflake(value: str) -> int:
+    try:
+        return int(value)
+    except ValueError:
+        raise web.HTTPBadRequest(text=f'{value!r} is not a Discord ID')
+
+def api_guild(bot, guild_id: int) -> discord.Guild:
+    """The guild if this bot (or shard) serves it; 404 otherwise, so unknown IDs never build a ranking."""
+    guild = bot.get_guild(guild_id)
+    if guild is None:
+        raise web.HTTPNotFound(text='Unknown guild')
+    return guild
+
+def api_stats_cog(bot):
+    stats_cog = bot.get_cog('Stats')
+    if stats_cog is None:
+        raise web.HTTPServiceUnavailable(text='Stats are not loaded')
+    return stats_cog
+
+def cached_name(bot, guild, user_id: int) -> str | None:
+    """Display name from the member caches only, or None if the member is not cached."""
+    user = bot.members.cached(guild, user_id) if guild is not None else bot.get_user(user_id)
+    return user.display_name if user is not None else None
+
+def player_json(stats_cog, ranking, user_id: int, row: dict | None) -> dict | None:
+    if row is None:
+        return None
+    return {
+        'wins': row['wins'],
+        'losses': row['losses'],
+        'duels': row['duels'],
+        'rating': round(row['rating'], 1),
+        'title': stats_cog.get_title(row['rating'], row['duels']),
+        'rank': ranking.rank(user_id),
+        'ranked_players': len(ranking),
+    }
+
+async def api_response(request, key, build):
+    """Serves build()'s JSON through the API cache, answering a matching If-None-Match with 304."""
+    cache = request.app['bot'].api_cache
+    body, etag = await cache.get(key, build)
+    headers = {
+        'ETag': f'"{etag}"',
+        'Cache-Control': f'public, max-age={int(cache.ttl)}',
+        'Access-Control-Allow-Origin': '*',
+    }
+    if any(tag.value in (etag, '*') for tag in request.if_none_match or ()):
+        cache.not_modified += 1
+        return web.Response(status=304, headers=headers)
+    return web.Response(body=body, content_type='application/json', headers=headers)
+
+async def leaderboard_api(request):
+    """Global (or one guild's) leaderboard, ?page= (from 1) and ?per_page= rows at a time."""
+    bot = request.app['bot']
+    guild = None
+    if 'guild_id' in request.match_info:
+        guild = api_guild(bot, parse_snowflake(request.match_info['guild_id']))
+    try:
+        page = int(request.query.get('page', 1))
+        per_page = int(request.query.get('per_page', 25))
+    except ValueError:
+        raise web.HTTPBadRequest(text='page and per_page must be integers')
+    if page < 1 or not 1 <= per_page <= config.STATS_API_MAX_PAGE_SIZE:
+        raise web.HTTPBadRequest(text=f'page must be at least 1 and per_page 1 to {config.STATS_API_MAX_PAGE_SIZE}')
+
+    async def build():
+        stats_cog = api_stats_cog(bot)
+        if guild is None:
+            ranking = bot.stats_store.ranking
+        else:
+            ranking = await bot.stats_store.guild_ranking(guild.id)
+        offset = (page - 1) * per_page
+        return {
+            'guild_id': str(guild.id) if guild is not None else None,
+            'page': page,
+            'per_page': per_page,
+            'total': len(ranking),
+            'players': [
+                {
+                    'rank': rank,
+                    'user_id': str(user_id),
+                    'name': cached_name(bot, guild, user_id),
+                    'rating': round(rating, 1),
+                    'wins': wins,
+                    'losses': losses,
+                    'title': stats_cog.get_title(rating, wins + losses),
+                }
+                for rank, (user_id, rating, wins, losses) in enumerate(ranking.page(offset, per_page), offset + 1)
+            ],
+        }
+
+    key = ('leaderboard', guild.id if guild is not None else None, page, per_page)
+    return await api_response(request, key, build)
+
+async def player_api(request):
+    """One player's global stats and rank, plus their stats in ?guild_id= if given."""
+    bot = request.app['bot']
+    user_id = parse_snowflake(request.match_info['user_id'])
+    # Every player who has dueled is in the global ranking, so unknown IDs are turned away
+    # here without a database read or an entry pushing real players out of the /stats cache
+    if user_id not in bot.stats_store.ranking:
+        raise web.HTTPNotFound(text='This player has not dueled yet')
+    guild = None
+    if 'guild_id' in request.query:
+        guild = api_guild(bot, parse_snowflake(request.query['guild_id']))
+
+    async def build():
+        stats_cog = api_stats_cog(bot)
+        totals = await stats_cog.player_cache.get(user_id)
+        payload = {
+            'user_id': str(user_id),
+            'name': cached_name(bot, guild, user_id),
+            'global': player_json(stats_cog, bot.stats_store.ranking, user_id, totals),
+        }
+        if guild is not None:
+            payload['guild_id'] = str(guild.id)
+            ranking = await bot.stats_store.guild_ranking(guild.id)
+            guild_row = await stats_cog.player_cache.get(user_id, guild.id) if user_id in ranking else None
+            payload['guild'] = player_json(stats_cog, ranking, user_id, guild_row)
+        return payload
+
+    key = ('player', user_id, guild.id if guild is not None else None)
+    return await api_response(request, key, build)
+
+def web_port(shard_id: int | None = None) -> int:
+    """Port a bot's web server listens on: PORT for a single process, PORT + 1 + shard_id for a shard.
+
+    Under launcher.py the launcher itself holds PORT.
+    """
+    port = int(os.environ.get('PORT', 10000))
+    return port if shard_id is None else port + 1 + shard_id
+
+async def run_web_server(bot):
     app = web.Application()
+    app['bot'] = bot
+    app['profile_lock'] = asyncio.Lock()
     app.router.add_get('/', health_check)
+    app.router.add_get('/ready', readiness_check)
+    app.router.add_get('/metrics', metrics_endpoint)
+    app.router.add_get('/debug/profile', profile_endpoint)
+    app.router.add_get('/admin/export/{kind}', export_endpoint)
+    app.router.add_get('/api/leaderboard', leaderboard_api)
+    app.router.add_get('/api/guilds/{guild_id}/leaderboard', leaderboard_api)
+    app.router.add_get('/api/players/{user_id}', player_api)
     runner = web.AppRunner(app)
     await runner.setup()
-    port = int(os.environ.get('PORT', 10000))
+    # A sharded bot always has a shard_id; a single process has None
+    port = web_port(bot.shard_id)
     site = web.TCPSite(runner, '0.0.0.0', port)
     await site.start()
     logger.info(f"Web server started on port {port}")
 
-# --- Database Setup ---
-DATABASE_FILE = 'data/settings.db'
-
-def initialize_database():
-    """Initializes the settings database and creates the settings table if it doesn't exist."""
-    try:
-        # Ensure data directory exists
-        os.makedirs(os.path.dirname(DATABASE_FILE), exist_ok=True)
-
-        conn = sqlite3.connect(DATABASE_FILE)
-        cursor = conn.cursor()
-
-        # Create table if it doesn't exist
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS guild_settings (
-                guild_id INTEGER PRIMARY KEY,
-                game_channel_id INTEGER DEFAULT NULL
-            )
-        ''')
-
-        conn.commit()
-        conn.close()
-        logger.info(f"Database initialized successfully at {DATABASE_FILE}")
-    except sqlite3.Error as e:
-        logger.error(f"Database initialization error: {e}", exc_info=True)
-    except Exception as e:
-        logger.error(f"An unexpected error occurred during database initialization: {e}", exc_info=True)
-
-# --- End Database Setup ---
 
 # Define necessary intents
 intents = discord.Intents.default()
 intents.message_content = True # If using message commands
 intents.members = True # To access member information
 
+def observe_command(interaction: discord.Interaction, status: str):
+    """Records how long a slash command took, if interaction_check stamped its start."""
+    started = interaction.extras.pop('started_at', None)
+    if started is None or interaction.command is None:
+        return
+    COMMAND_LATENCY.observe(time.perf_counter() - started,
+                            command=interaction.command.qualified_name, status=status)
+
+
+class QuickDrawTree(app_commands.CommandTree):
+    """Command tree that answers shared check failures with a friendly message.
+
+    It also times every command: interaction_check stamps the start, and
+    on_error or the bot's completion listener records the duration.
+    """
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        interaction.extras['started_at'] = time.perf_counter()
+        # Without a gateway member cache, this is how players' names stay resolvable
+        interaction.client.members.remember(interaction.user)
+        return True
+
+    async def on_error(self, interaction: discord.Interaction, error: app_commands.AppCommandError):
+        observe_command(interaction, 'rejected' if isinstance(error, app_commands.CheckFailure) else 'error')
+        if isinstance(error, NotInGameChannel):
+            await interaction.response.send_message(str(error), ephemeral=True)
+            return
+        await super().on_error(interaction, error)
+
+
 class QuickDrawBot(commands.Bot):
-    """Main bot class for QuickDraw Showdown."""
-    def __init__(self):
-        super().__init__(command_prefix=config.COMMAND_PREFIX, intents=intents)
+    """Main bot class for QuickDraw Showdown.
+
+    Runs as a single process by default. launcher.py passes shard_id and
+    shard_count to run one shard per process against the same data files.
+    With config.LEAN_MEMBER_CACHE it skips member chunking and caches only
+    the bot's own member, leaving MemberResolver to remember players.
+    """
+    def __init__(self, shard_id: int | None = None, shard_count: int | None = None):
+        member_options = {}
+        if config.LEAN_MEMBER_CACHE:
+            member_options = {
+                'member_cache_flags': discord.MemberCacheFlags.none(),
+                'chunk_guilds_at_startup': False,
+            }
+        super().__init__(
+            command_prefix=config.COMMAND_PREFIX, intents=intents, tree_cls=QuickDrawTree,
+            shard_id=shard_id, shard_count=shard_count, **member_options
+        )
+        sharded = shard_count is not None and shard_count > 1
+        # Other shards write to the same stats database, so poll for their changes
+        self.stats_store = StatsStore(sync_interval=config.SHARD_SYNC_INTERVAL if sharded else None)
+        self.settings_db = SettingsDatabase()
+        self.guild_settings = GuildSettingsCache(self.settings_db)
+        self.members = MemberResolver(ttl=config.MEMBER_CACHE_TTL, max_size=config.MEMBER_CACHE_SIZE)
+        self.tournament_journal = TournamentJournal()
+        # Discord's global rate limit is per bot, so shards split it between them
+        self.api_cache = ResponseCache()
+        self.outbox = Outbox(global_rate=(max(1, config.GLOBAL_RATE_LIMIT // (shard_count or 1)), 1.0))
+        self.startup_timings = {}  # Format: {phase: seconds}, filled in by setup_hook
+        self.watchdog = LoopWatchdog()
+        self.register_metrics()
+
+    def register_metrics(self):
+        """Registers scrape-time gauges that read this bot's live state."""
+        def executor_depths():
+            return {
+                'default': executor_queue_depth(getattr(asyncio.get_running_loop(), '_default_executor', None)),
+                'stats-store': self.stats_store.queue_depth,
+                'settings-db': self.settings_db.queue_depth,
+            }
+
+        def stats_cache_lookups():
+            cache = self.get_cog('Stats').player_cache
+            return {'hit': cache.hits, 'miss': cache.misses}
+
+        def leaderboard_cache_lookups():
+            cache = self.get_cog('Stats').leaderboard_cache
+            return {'hit': cache.hits, 'miss': cache.misses, 'rebuild': cache.rebuilds}
+
+        def api_cache_lookups():
+            stats = self.api_cache.stats()
+            return {'hit': stats['hits'], 'miss': stats['misses'], 'not_modified': stats['not_modified']}
+
+        def cog_size(cog_name, attribute):
+            cog = self.get_cog(cog_name)
+            return len(getattr(cog, attribute)) if cog is not None else 0
+
+        REGISTRY.gauge('quickdraw_executor_queue_depth', 'Jobs waiting for a thread, per executor.',
+                       executor_depths, labelnames=('executor',))
+        REGISTRY.gauge('quickdraw_pending_challenges', 'Duel challenges waiting to be accepted.',
+                       lambda: cog_size('Duel', 'challenges'))
+        REGISTRY.gauge('quickdraw_active_tournaments', 'Guilds with a tournament in progress.',
+                       lambda: cog_size('Tournament', 'active_tournaments'))
+        REGISTRY.gauge('quickdraw_stats_cache_lookups', '/stats player cache lookups since startup, by result.',
+                       stats_cache_lookups, labelnames=('result',))
+        REGISTRY.gauge('quickdraw_stats_cache_entries', 'Player rows held in the /stats cache.',
+                       lambda: len(self.get_cog('Stats').player_cache))
+        REGISTRY.gauge('quickdraw_leaderboard_cache_lookups',
+                       'Rendered /leaderboard cache lookups and rebuilds since startup.',
+                       leaderboard_cache_lookups, labelnames=('result',))
+        REGISTRY.gauge('quickdraw_api_cache_lookups',
+                       'Public stats API response cache lookups, and 304s served, since startup.',
+                       api_cache_lookups, labelnames=('result',))
+        REGISTRY.gauge('quickdraw_outbox_backlog', 'Outbound messages and edits queued in the outbox.',
+                       lambda: self.outbox.depth)
+        REGISTRY.gauge('quickdraw_outbox_in_flight', 'Channels with an outbox request on the wire.',
+                       lambda: self.outbox.stats()['in_flight'])
+        REGISTRY.gauge('quickdraw_gateway_latency_seconds', 'Latency between a gateway heartbeat and its ack.',
+                       lambda: self.latency)
+        REGISTRY.gauge('quickdraw_event_loop_lag_seconds', 'Worst event loop lag over the last minute.',
+                       lambda: self.watchdog.max_lag)
+        REGISTRY.gauge('quickdraw_event_loop_stalls', 'Event loop stalls over the watchdog threshold since startup.',
+                       lambda: self.watchdog.stalls)
+        REGISTRY.gauge('quickdraw_ready', '1 when the bot is ready to serve commands.',
+                       lambda: int(all(self.readiness().values())))
+
+    def readiness(self) -> dict[str, bool]:
+        """Individual readiness checks; the bot is ready only when all pass."""
+        return {
+            'gateway_connected': self.is_ready() and not self.is_closed() and math.isfinite(self.latency),
+            'stats_store_open': self.stats_store.is_open,
+            'settings_db_open': self.settings_db.is_open,
+        }
+
+    async def open_databases(self):
+        """Opens both databases side by side; their setup runs on their own executors."""
+        async def open_settings():
+            await self.settings_db.open()
+            await self.guild_settings.load()
+
+        await asyncio.gather(open_settings(), self.stats_store.open())
+
+    async def load_cogs(self) -> int:
+        """Loads every cog in ./cogs concurrently. Returns how many loaded."""
+        cog_names = [
+            f'cogs.{filename[:-3]}' for filename in sorted(os.listdir('./cogs'))
+            if filename.endswith('.py') and not filename.startswith('_')
+        ]
+        # Cogs only share state through the bot, so one failing does not stop the others
+        results = await asyncio.gather(
+            *(self.load_extension(cog_name) for cog_name in cog_names), return_exceptions=True
+        )
+        cogs_loaded = 0
+        for cog_name, result in zip(cog_names, results):
+            if isinstance(result, BaseException):
+                logger.error(f'Failed to load cog {cog_name}: {result}', exc_info=result)
+            else:
+                logger.info(f'Successfully loaded cog: {cog_name}')
+                cogs_loaded += 1
+        return cogs_loaded
+
+    @staticmethod
+    def command_tree_hash(commands) -> str:
+        """Stable hash of the command payloads Discord would receive on sync."""
+        payload = sorted((command.to_dict() for command in commands), key=lambda data: data['name'])
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest()
+
+    async def sync_commands(self) -> bool:
+        """Syncs slash commands to the configured guild, skipping the REST call if nothing changed.
+
+        Returns True if a sync was sent.
+        """
+        guild = discord.Object(id=config.COMMAND_SYNC_GUILD_ID)
+        self.tree.copy_global_to(guild=guild)  # Copy global commands to guild
+        tree_hash = self.command_tree_hash(self.tree.get_commands(guild=guild))
+        meta_key = f'command_tree_hash:{guild.id}'
+        if not config.FORCE_COMMAND_SYNC and await self.settings_db.get_meta(meta_key) == tree_hash:
+            logger.info(f'Slash commands for guild {guild.id} are unchanged; skipping sync.')
+            return False
+        await self.tree.sync(guild=guild)
+        # Only remember the hash once Discord has accepted it, so a failed sync retries next boot
+        await self.settings_db.set_meta(meta_key, tree_hash)
+        logger.info(f'Synced slash commands to guild {guild.id}.')
+        return True
 
     async def setup_hook(self):
-        """Loads cogs automatically when the bot starts."""
-        # Initialize database first
-        initialize_database()
+        """Opens the databases, loads cogs and syncs slash commands, timing each phase."""
+        self.watchdog.start()
+        timings = self.startup_timings
+        started = phase_started = time.perf_counter()
+
+        def end_phase(name):
+            nonlocal phase_started
+            now = time.perf_counter()
+            timings[name] = now - phase_started
+            phase_started = now
+
+        # Initialize databases first
+        await self.open_databases()
+        end_phase('databases')
 
         logger.info(f'Loading cogs...')
-        cogs_loaded = 0
-        for filename in os.listdir('./cogs'):
-            if filename.endswith('.py') and not filename.startswith('_'):
-                cog_name = f'cogs.{filename[:-3]}'
-                try:
-                    await self.load_extension(cog_name)
-                    logger.info(f'Successfully loaded cog: {cog_name}')
-                    cogs_loaded += 1
-                except Exception as e:
-                    logger.error(f'Failed to load cog {cog_name}: {e}', exc_info=True)
+        cogs_loaded = await self.load_cogs()
         logger.info(f'Loaded {cogs_loaded} cogs.')
+        end_phase('cogs')
+
+        # Pick up tournaments interrupted by a restart (they wait for the gateway before playing)
+        tournament = self.get_cog('Tournament')
+        if tournament is not None:
+            await tournament.resume_tournaments()
+        end_phase('resume')
+
+        # Commands belong to the application, so only the first shard syncs them
+        if self.shard_id in (None, 0):
+            try:
+                await self.sync_commands()
+            except Exception as e:
+                logger.error(f'Failed to sync commands to guild: {e}')
+            end_phase('command_sync')
+
+        timings['total'] = time.perf_counter() - started
+        logger.info('Startup timings: ' + ', '.join(f'{name} {seconds * 1000:.0f}ms' for name, seconds in timings.items()))
+
+    async def close(self):
+        """Closes the outbox, journals and databases after the Discord connection shuts down."""
+        await super().close()
+        self.watchdog.stop()
+        await self.outbox.close()
+        await self.tournament_journal.close()
+        await self.stats_store.close()
+        await self.settings_db.close()
+
+    async def on_app_command_completion(self, interaction: discord.Interaction, command):
+        observe_command(interaction, 'ok')
 
-        # Sync slash commands if needed (usually good practice on startup)
-        # Note: Syncing globally can take time. For testing, sync to specific guilds.
-        # await self.tree.sync() # Sync globally
-
-        # Sync to a specific guild for testing (faster)
-        # Replace YOUR_TEST_GUILD_ID with your test guild ID
-        try:
-            guild_id = 1363216998879723590 # <--- SERVER ID INSERTED
-            guild = discord.Object(id=guild_id)
-            self.tree.copy_global_to(guild=guild) # Copy global commands to guild
-            await self.tree.sync(guild=guild)
-            logger.info(f'Synced slash commands to guild {guild_id}.')
-        except Exception as e:
-            logger.error(f'Failed to sync commands to guild: {e}')
+    async def on_raw_member_remove(self, payload: discord.RawMemberRemoveEvent):
+        # Fires whether or not the member was cached, unlike on_member_remove
+        self.members.invalidate(payload.guild_id, payload.user.id)
 
     async def on_ready(self):
         """Called when the bot is ready and connected to Discord."""
@@ -110,7 +500,7 @@ async def main():
     bot = QuickDrawBot()
     
     # Start web server
-    await run_web_server()
+    await run_web_server(bot)
     
     try:
         await bot.start(config.BOT_TOKEN)
@@ -1,22 +1,32 @@
 import discord
-import json
 import random
 import asyncio
+import logging
 from discord import app_commands
 from discord.ext import commands
 
-# Import the database getter function
-from cogs.settings import get_game_channel_db
+from utils.challenges import ChallengeRegistry
+from utils.checks import game_channel_only
+from utils.matchmaking import MatchmakingQueue
+from utils.outbox import Priority
+from utils.rating import DEFAULT_RATING
 
 import config
 
+logger = logging.getLogger(__name__)
+
 
 class Duel(commands.Cog):
     """Cog for handling duels between players in QuickDraw Showdown."""
     
     def __init__(self, bot):
         self.bot = bot
-        self.active_duels = {}  # Format: {challenger_id: (target_id, channel_id)}
+        self.challenges = ChallengeRegistry(config.CHALLENGE_TIMEOUT, on_expire=self.challenge_expired)
+        self.queue = MatchmakingQueue(
+            config.QUEUE_BASE_RANGE, config.QUEUE_WIDEN_RATE, config.QUEUE_MAX_RANGE, config.QUEUE_TIMEOUT,
+            on_match=self.queue_matched, on_expire=self.queue_expired
+        )
+        self.queue_duels = set()  # Duel tasks started by the matchmaking sweep
         self.duel_outcomes = [
             "{loser} got distracted by a tumbleweed. {winner} wins!",
             "{loser} tried to draw but dropped their revolver!",
@@ -30,52 +40,92 @@ class Duel(commands.Cog):
             "{winner} shot with deadly precision. {loser} never saw it coming."
         ]
     
-    async def update_stats(self, winner_id, loser_id):
+    async def cog_unload(self):
+        """Stop the challenge and queue sweepers (and queued duels) when the cog is unloaded."""
+        self.challenges.close()
+        self.queue.close()
+        for task in self.queue_duels:
+            task.cancel()
+    
+    async def challenge_expired(self, challenge):
+        """Let the channel know an ignored challenge has expired."""
+        channel = self.bot.get_channel(challenge.channel_id)
+        if channel is not None:
+            self.bot.outbox.send(
+                channel,
+                f"⌛ <@{challenge.challenger_id}>'s challenge to <@{challenge.target_id}> has expired.",
+                allowed_mentions=discord.AllowedMentions.none()
+            )
+    
+    async def queue_expired(self, entry):
+        """Let the channel know nobody was found for a queued player."""
+        channel = self.bot.get_channel(entry.channel_id)
+        if channel is not None:
+            self.bot.outbox.send(
+                channel,
+                f"⌛ No opponent turned up for <@{entry.user_id}>. They've left the queue.",
+                allowed_mentions=discord.AllowedMentions.none()
+            )
+    
+    async def queue_matched(self, entry, opponent):
+        """Start a duel for two players the matchmaking sweep paired up."""
+        channel = self.bot.get_channel(entry.channel_id)
+        if channel is None:
+            return
+        await self.bot.outbox.send(
+            channel, f"🎯 Matchmaking paired {entry.member.mention} with {opponent.member.mention}! The duel will begin shortly..."
+        )
+        task = asyncio.get_running_loop().create_task(
+            self.run_duel(channel, entry.member, opponent.member, channel.guild.id)
+        )
+        self.queue_duels.add(task)
+        task.add_done_callback(self.queue_duels.discard)
+    
+    async def run_duel(self, channel, challenger, target, guild_id):
+        """Play out the countdown and draw between two players, then record the result."""
+        # Countdown (ticks are cosmetic and may be dropped if the channel is busy)
+        outbox = self.bot.outbox
+        countdown_msg = await outbox.send(channel, "Get ready...", coalesce=False)
+        for i in range(3, 0, -1):
+            outbox.edit(countdown_msg, content=f"Get ready... {i}")
+            await asyncio.sleep(1)
+        
+        # Same priority as the result, so the result can never overtake the draw
+        outbox.edit(countdown_msg, content="**DRAW!** 🔫", priority=Priority.RESULT)
+        await asyncio.sleep(1.5)
+        
+        # Determine winner (random for now)
+        if random.random() < 0.5:
+            winner, loser = challenger, target
+        else:
+            winner, loser = target, challenger
+        
+        # Get a random outcome message
+        outcome = random.choice(self.duel_outcomes)
+        outcome = outcome.format(winner=winner.display_name, loser=loser.display_name)
+        
+        # Send the result (queued together so the outbox can merge them)
+        await asyncio.gather(
+            outbox.send(channel, f"💥 {outcome}", priority=Priority.RESULT),
+            outbox.send(channel, f"🏆 {winner.mention} wins the duel against {loser.mention}!", priority=Priority.RESULT)
+        )
+        
+        # Update stats
+        await self.update_stats(winner.id, loser.id, guild_id)
+    
+    async def update_stats(self, winner_id, loser_id, guild_id):
         """Update player statistics after a duel."""
         try:
-            # Read current stats
-            with open(config.DATA_FILE, 'r') as f:
-                stats = json.load(f)
-            
-            # Initialize player entries if they don't exist
-            for player_id in (winner_id, loser_id):
-                if str(player_id) not in stats:
-                    stats[str(player_id)] = {
-                        'wins': 0,
-                        'losses': 0,
-                        'duels': 0
-                    }
-            
-            # Update stats
-            stats[str(winner_id)]['wins'] += 1
-            stats[str(winner_id)]['duels'] += 1
-            stats[str(loser_id)]['losses'] += 1
-            stats[str(loser_id)]['duels'] += 1
-            
-            # Write updated stats
-            with open(config.DATA_FILE, 'w') as f:
-                json.dump(stats, f, indent=4)
-                
+            await self.bot.stats_store.record_result(winner_id, loser_id, guild_id)
         except Exception as e:
             # Log the error but don't crash
-            print(f"Error updating stats: {e}")
+            logger.error(f"Error updating stats: {e}", exc_info=True)
     
     @app_commands.command(name="duel", description="Challenge another player to a QuickDraw duel!")
+    @game_channel_only()
     @app_commands.describe(target="The player you want to challenge")
     async def duel_command(self, interaction: discord.Interaction, target: discord.Member):
         """Challenge another player to a QuickDraw duel."""
-        # NEW CHECK:
-        guild_id = interaction.guild_id
-        allowed_channel_id = await self.bot.loop.run_in_executor(
-            None, get_game_channel_db, guild_id
-        )
-        if allowed_channel_id is not None and interaction.channel_id != allowed_channel_id:
-            await interaction.response.send_message(
-                f"This command can only be used in <#{allowed_channel_id}>!",
-                ephemeral=True
-            )
-            return
-
         challenger = interaction.user
         
         # Check if target is valid (not self, not a bot)
@@ -88,18 +138,26 @@ class Duel(commands.Cog):
             return
         
         # Check if challenger is already in a duel
-        if challenger.id in self.active_duels:
+        if self.challenges.by_challenger(challenger.id) is not None:
             await interaction.response.send_message("You're already in a duel! Finish that one first.", ephemeral=True)
             return
         
         # Check if target is already in a duel
-        for (_, target_info) in self.active_duels.values():
-            if target.id == target_info:
-                await interaction.response.send_message(f"{target.display_name} is already in a duel! Wait your turn.", ephemeral=True)
-                return
+        if self.challenges.by_target(target.id) is not None:
+            await interaction.response.send_message(f"{target.display_name} is already in a duel! Wait your turn.", ephemeral=True)
+            return
+        
+        # Queued players are spoken for until they leave the queue
+        if challenger.id in self.queue:
+            await interaction.response.send_message("You're waiting in the matchmaking queue! Use `/leave_queue` first.", ephemeral=True)
+            return
+        
+        if target.id in self.queue:
+            await interaction.response.send_message(f"{target.display_name} is waiting in the matchmaking queue for an opponent.", ephemeral=True)
+            return
         
         # Create a new duel
-        self.active_duels[challenger.id] = (target.id, interaction.channel_id)
+        self.challenges.add(challenger.id, target.id, interaction.channel_id)
         
         await interaction.response.send_message(
             f"🤠 {challenger.mention} has challenged {target.mention} to a QuickDraw duel!\n"
@@ -107,71 +165,74 @@ class Duel(commands.Cog):
         )
     
     @app_commands.command(name="accept", description="Accept a duel challenge")
+    @game_channel_only()
     async def accept_command(self, interaction: discord.Interaction):
         """Accept a pending duel challenge."""
-        # NEW CHECK:
-        guild_id = interaction.guild_id
-        allowed_channel_id = await self.bot.loop.run_in_executor(
-            None, get_game_channel_db, guild_id
-        )
-        if allowed_channel_id is not None and interaction.channel_id != allowed_channel_id:
-            await interaction.response.send_message(
-                f"This command can only be used in <#{allowed_channel_id}>!",
-                ephemeral=True
-            )
-            return
-
         target = interaction.user
         
         # Find if there's a duel waiting for this user to accept
-        challenger_id = None
-        for c_id, (t_id, channel_id) in self.active_duels.items():
-            if t_id == target.id and channel_id == interaction.channel_id:
-                challenger_id = c_id
-                break
+        challenge = self.challenges.find(target.id, interaction.channel_id)
         
-        if challenger_id is None:
+        if challenge is None:
             await interaction.response.send_message("There's no duel waiting for you to accept in this channel!", ephemeral=True)
             return
         
+        # Remove the duel from pending challenges before awaiting anything
+        self.challenges.remove(challenge)
+        
         # Get challenger object
-        challenger = interaction.guild.get_member(challenger_id)
+        challenger = await self.bot.members.resolve_one(interaction.guild, challenge.challenger_id)
         if not challenger:
             await interaction.response.send_message("The challenger seems to have left the server! Duel cancelled.", ephemeral=True)
-            self.active_duels.pop(challenger_id, None)
             return
         
         # Duel accepted, start the countdown
         await interaction.response.send_message(f"🔫 {target.mention} has accepted {challenger.mention}'s challenge! The duel will begin shortly...")
+        await self.run_duel(interaction.channel, challenger, target, interaction.guild_id)
+    
+    @app_commands.command(name="queue", description="Wait for an opponent of similar skill and duel them automatically")
+    @game_channel_only()
+    async def queue_command(self, interaction: discord.Interaction):
+        """Join the matchmaking queue; the duel starts as soon as a fair opponent is found."""
+        player = interaction.user
+        
+        if player.id in self.queue:
+            await interaction.response.send_message("You're already in the queue, partner. Hold tight!", ephemeral=True)
+            return
         
-        # Remove the duel from active duels
-        self.active_duels.pop(challenger_id, None)
-        
-        # Countdown
-        countdown_msg = await interaction.channel.send("Get ready...")
-        for i in range(3, 0, -1):
-            await countdown_msg.edit(content=f"Get ready... {i}")
-            await asyncio.sleep(1)
-        
-        await countdown_msg.edit(content="**DRAW!** 🔫")
-        await asyncio.sleep(1.5)
+        if self.challenges.by_challenger(player.id) is not None or self.challenges.by_target(player.id) is not None:
+            await interaction.response.send_message("You're already in a duel! Finish that one first.", ephemeral=True)
+            return
         
-        # Determine winner (random for now)
-        if random.random() < 0.5:
-            winner, loser = challenger, target
-        else:
-            winner, loser = target, challenger
+        # Match on this server's rating; newcomers start at the default
+        player_stats = await self.bot.stats_store.get_player(player.id, interaction.guild_id)
+        rating = player_stats['rating'] if player_stats is not None else DEFAULT_RATING
         
-        # Get a random outcome message
-        outcome = random.choice(self.duel_outcomes)
-        outcome = outcome.format(winner=winner.display_name, loser=loser.display_name)
+        # The player may have queued again while the rating was loading
+        if player.id in self.queue:
+            await interaction.response.send_message("You're already in the queue, partner. Hold tight!", ephemeral=True)
+            return
         
-        # Send the result
-        await interaction.channel.send(f"💥 {outcome}")
-        await interaction.channel.send(f"🏆 {winner.mention} wins the duel against {loser.mention}!")
+        opponent = self.queue.add(player.id, interaction.channel_id, rating, member=player)
+        if opponent is None:
+            await interaction.response.send_message(
+                f"🕰️ {player.mention} is looking for a duel! Use `/queue` to take them on.",
+                allowed_mentions=discord.AllowedMentions.none()
+            )
+            return
         
-        # Update stats
-        await self.update_stats(winner.id, loser.id)
+        await interaction.response.send_message(
+            f"🎯 Matchmaking paired {opponent.member.mention} with {player.mention}! The duel will begin shortly..."
+        )
+        await self.run_duel(interaction.channel, opponent.member, player, interaction.guild_id)
+    
+    @app_commands.command(name="leave_queue", description="Stop waiting for a matchmaking opponent")
+    async def leave_queue_command(self, interaction: discord.Interaction):
+        """Leave the matchmaking queue."""
+        if self.queue.remove(interaction.user.id) is None:
+            await interaction.response.send_message("You're not in the queue!", ephemeral=True)
+            return
+        await interaction.response.send_message("You've left the matchmaking queue.", ephemeral=True)
 
 
 async def setup(bot):
@@ -1,54 +1,10 @@
 # cogs/settings.py
 import discord
-import sqlite3
 from discord import app_commands
 from discord.ext import commands
 import logging
-import os # Import os
 
 logger = logging.getLogger(__name__)
-DATABASE_FILE = 'data/settings.db' # Define database file path
-
-# --- Database Helper Functions ---
-
-def set_game_channel_db(guild_id: int, channel_id: int | None):
-    """Sets or clears the game channel ID for a specific guild."""
-    try:
-        conn = sqlite3.connect(DATABASE_FILE)
-        cursor = conn.cursor()
-        cursor.execute('''
-            INSERT OR REPLACE INTO guild_settings (guild_id, game_channel_id)
-            VALUES (?, ?)
-        ''', (guild_id, channel_id))
-        conn.commit()
-        conn.close()
-        logger.info(f"Set game channel for guild {guild_id} to {channel_id}")
-        return True
-    except sqlite3.Error as e:
-        logger.error(f"Error setting game channel for guild {guild_id}: {e}", exc_info=True)
-        return False
-
-def get_game_channel_db(guild_id: int) -> int | None:
-    """Gets the configured game channel ID for a specific guild."""
-    try:
-        conn = sqlite3.connect(DATABASE_FILE)
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT game_channel_id FROM guild_settings WHERE guild_id = ?
-        ''', (guild_id,))
-        result = cursor.fetchone()
-        conn.close()
-        if result and result[0] is not None:
-            logger.debug(f"Retrieved game channel {result[0]} for guild {guild_id}")
-            return result[0]
-        else:
-            logger.debug(f"No specific game channel configured for guild {guild_id}")
-            return None
-    except sqlite3.Error as e:
-        logger.error(f"Error getting game channel for guild {guild_id}: {e}", exc_info=True)
-        return None
-
-# --- End Database Helper Functions ---
 
 
 class Settings(commands.Cog):
@@ -65,11 +21,8 @@ class Settings(commands.Cog):
         guild_id = interaction.guild_id
         channel_id = channel.id if channel else None
 
-        # Attempt to update the database
-        # Using run_in_executor to avoid blocking the event loop with DB operations
-        success = await self.bot.loop.run_in_executor(
-            None, set_game_channel_db, guild_id, channel_id
-        )
+        # Attempt to update the database; the shared cache is only updated on success
+        success = await self.bot.guild_settings.set_game_channel(guild_id, channel_id)
 
         if success:
             if channel:
@@ -1,12 +1,12 @@
 import discord
-import json
 from discord import app_commands
 from discord.ext import commands
 
-# Import the database getter function
-from cogs.settings import get_game_channel_db
-
 import config
+from utils.checks import game_channel_only
+from utils.leaderboard_cache import LeaderboardCache
+from utils.rating import PROVISIONAL_DUELS
+from utils.stats_cache import PlayerStatsCache
 
 
 class Stats(commands.Cog):
@@ -14,75 +14,65 @@ class Stats(commands.Cog):
     
     def __init__(self, bot):
         self.bot = bot
+        self.player_cache = PlayerStatsCache(bot.stats_store)
+        self.leaderboard_cache = LeaderboardCache(bot.stats_store, size=10)
         self.titles = {
-            0: 'Newcomer',
-            3: 'Greenhorn',
-            5: 'Deputy',
-            10: 'Sheriff',
-            15: 'Gunslinger',
-            20: 'Desperado',
-            30: 'Outlaw',
-            40: 'Legend of the West'
+            0: 'Greenhorn',
+            1450: 'Deputy',
+            1525: 'Sheriff',
+            1600: 'Gunslinger',
+            1700: 'Desperado',
+            1800: 'Outlaw',
+            1900: 'Legend of the West'
         }
     
-    def get_title(self, wins):
-        """Get a player's title based on their win count."""
-        title = 'Newcomer'  # Default title
-        for win_threshold, new_title in sorted(self.titles.items()):
-            if wins >= win_threshold:
+    def get_title(self, rating, duels):
+        """Get a player's title based on their rating (everyone is a Newcomer until it settles)."""
+        if duels < PROVISIONAL_DUELS:
+            return 'Newcomer'
+        title = 'Greenhorn'  # Default title
+        for rating_threshold, new_title in sorted(self.titles.items()):
+            if rating >= rating_threshold:
                 title = new_title
             else:
                 break
         return title
     
-    def load_stats(self):
-        """Load player statistics from the data file."""
-        try:
-            with open(config.DATA_FILE, 'r') as f:
-                return json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
-            # If file doesn't exist or is invalid, return empty dict
-            return {}
+    async def cog_load(self):
+        """Keep the player and leaderboard caches in step with every recorded result."""
+        self.bot.stats_store.add_listener(self.player_cache.on_write)
+        self.bot.stats_store.add_listener(self.leaderboard_cache.on_write)
+    
+    async def cog_unload(self):
+        self.bot.stats_store.remove_listener(self.player_cache.on_write)
+        self.bot.stats_store.remove_listener(self.leaderboard_cache.on_write)
     
     @app_commands.command(name="stats", description="Show your or another player's duel statistics")
+    @game_channel_only()
     @app_commands.describe(player="The player whose stats you want to see (leave empty for your own stats)")
     async def stats_command(self, interaction: discord.Interaction, player: discord.Member = None):
         """Display duel statistics for yourself or another player."""
-        # NEW CHECK:
-        guild_id = interaction.guild_id
-        allowed_channel_id = await self.bot.loop.run_in_executor(
-            None, get_game_channel_db, guild_id
-        )
-        if allowed_channel_id is not None and interaction.channel_id != allowed_channel_id:
-            await interaction.response.send_message(
-                f"This command can only be used in <#{allowed_channel_id}>!",
-                ephemeral=True
-            )
-            return
-
         # If no player specified, show stats for the command user
         if player is None:
             player = interaction.user
         
-        # Load stats data
-        stats = self.load_stats()
-        player_id = str(player.id)
+        # Load this player's stats in this server, plus their totals across every server
+        player_stats, totals = await self.player_cache.get_summary(player.id, interaction.guild_id)
         
         # Check if player has stats
-        if player_id not in stats:
-            await interaction.response.send_message(
-                f"{player.display_name} hasn't participated in any duels yet!", 
-                ephemeral=True
-            )
+        if player_stats is None:
+            message = f"{player.display_name} hasn't participated in any duels in this server yet!"
+            if totals is not None:
+                message += f" (Across all servers: {totals['wins']} wins, {totals['losses']} losses)"
+            await interaction.response.send_message(message, ephemeral=True)
             return
         
-        # Get player stats
-        player_stats = stats[player_id]
         wins = player_stats.get('wins', 0)
         losses = player_stats.get('losses', 0)
         duels = player_stats.get('duels', 0)
+        rating = player_stats.get('rating')
         win_rate = (wins / duels * 100) if duels > 0 else 0
-        title = self.get_title(wins)
+        title = self.get_title(rating, duels)
         
         # Create embed
         embed = discord.Embed(
@@ -95,6 +85,25 @@ class Stats(commands.Cog):
         embed.add_field(name="Losses", value=str(losses), inline=True)
         embed.add_field(name="Total Duels", value=str(duels), inline=True)
         embed.add_field(name="Win Rate", value=f"{win_rate:.1f}%", inline=True)
+        embed.add_field(name="Rating", value=f"{rating:.0f}", inline=True)
+        
+        ranking = await self.bot.stats_store.guild_ranking(interaction.guild_id)
+        rank = ranking.rank(player.id)
+        if rank is not None:
+            percentile = ranking.percentile(player.id)
+            embed.add_field(
+                name="Rank", value=f"#{rank} of {len(ranking)} (ahead of {percentile:.0f}%)", inline=True
+            )
+        
+        # Rolled-up totals across every server the bot is in
+        if totals is not None:
+            global_rank = self.bot.stats_store.ranking.rank(player.id)
+            embed.add_field(
+                name="All Servers",
+                value=f"Wins: {totals['wins']} | Losses: {totals['losses']} | "
+                      f"Rating: {totals['rating']:.0f} | Rank: #{global_rank}",
+                inline=False
+            )
         
         # Set thumbnail to player's avatar if available
         if player.avatar:
@@ -103,64 +112,77 @@ class Stats(commands.Cog):
         await interaction.response.send_message(embed=embed)
     
     @app_commands.command(name="leaderboard", description="Show the top duelists")
-    async def leaderboard_command(self, interaction: discord.Interaction):
-        """Display the top players ranked by wins."""
-        # NEW CHECK:
-        guild_id = interaction.guild_id
-        allowed_channel_id = await self.bot.loop.run_in_executor(
-            None, get_game_channel_db, guild_id
+    @game_channel_only()
+    @app_commands.describe(everywhere="Rank players across every server instead of just this one")
+    async def leaderboard_command(self, interaction: discord.Interaction, everywhere: bool = False):
+        """Display the top players in this server (or everywhere) ranked by rating."""
+        if everywhere:
+            ranking = self.bot.stats_store.ranking
+        else:
+            ranking = await self.bot.stats_store.guild_ranking(interaction.guild_id)
+        
+        # Reuse the rendered board until a result changes who is on it
+        guild = interaction.guild
+        embed = await self.leaderboard_cache.get(
+            (guild.id, everywhere), ranking, lambda top_players: self.render_leaderboard(guild, everywhere, top_players)
         )
-        if allowed_channel_id is not None and interaction.channel_id != allowed_channel_id:
-            await interaction.response.send_message(
-                f"This command can only be used in <#{allowed_channel_id}>!",
-                ephemeral=True
-            )
-            return
-
-        # Load stats data
-        stats = self.load_stats()
         
-        if not stats:
+        if embed is None:
             await interaction.response.send_message("No duels have been recorded yet!", ephemeral=True)
             return
         
-        # Sort players by wins
-        sorted_players = sorted(
-            stats.items(),
-            key=lambda x: (x[1].get('wins', 0), -x[1].get('losses', 0)),
-            reverse=True
-        )
-        
-        # Take top 10 players
-        top_players = sorted_players[:10]
+        await interaction.response.send_message(embed=embed)
+    
+    async def render_leaderboard(self, guild: discord.Guild, everywhere: bool, top_players) -> discord.Embed | None:
+        """Build the leaderboard embed for the top players, or None if nobody has dueled yet."""
+        if not top_players:
+            return None
         
         # Create embed
         embed = discord.Embed(
             title="🏆 QuickDraw Showdown Leaderboard",
-            description="The fastest gunslingers in the West!",
+            description="The fastest gunslingers in the West!" if everywhere
+                else f"The fastest gunslingers in {guild.name}!",
             color=discord.Color.gold()
         )
         
+        # Resolve every name at once (they might have left the server)
+        names = await self.bot.members.display_names(
+            guild, [player_id for player_id, _, _, _ in top_players]
+        )
+        
         # Add fields for each top player
-        for index, (player_id, player_stats) in enumerate(top_players, 1):
-            # Try to get member info (they might have left the server)
-            try:
-                member = await interaction.guild.fetch_member(int(player_id))
-                name = member.display_name
-            except (discord.NotFound, discord.HTTPException):
-                name = f"Unknown Gunslinger ({player_id})"
-            
-            wins = player_stats.get('wins', 0)
-            losses = player_stats.get('losses', 0)
-            title = self.get_title(wins)
+        for index, (player_id, rating, wins, losses) in enumerate(top_players, 1):
+            name = names[player_id]
+            title = self.get_title(rating, wins + losses)
             
             embed.add_field(
                 name=f"{index}. {name}",
-                value=f"**{title}**\nWins: {wins} | Losses: {losses}",
+                value=f"**{title}**\nRating: {rating:.0f} | Wins: {wins} | Losses: {losses}",
                 inline=False
             )
         
-        await interaction.response.send_message(embed=embed)
+        return embed
+    
+    @app_commands.command(name="backfill_ratings", description="Rebuild every stat and rating from the duel event log")
+    @app_commands.default_permissions(administrator=True)
+    async def backfill_ratings_command(self, interaction: discord.Interaction):
+        """Replay the duel event log onto the last snapshot to rebuild stats and ratings (bot admins only)."""
+        # Ratings are shared by every server, so this is limited to the bot's own admins
+        if interaction.user.id not in config.ADMIN_IDS:
+            await interaction.response.send_message("Only bot admins can backfill ratings.", ephemeral=True)
+            return
+        
+        await interaction.response.defer(ephemeral=True)
+        try:
+            replayed = await self.bot.stats_store.backfill_ratings()
+        except Exception as e:
+            await interaction.followup.send(f"Backfill failed: {e}", ephemeral=True)
+            return
+        await interaction.followup.send(
+            f"Rebuilt stats for {len(self.bot.stats_store.ranking)} players, replaying {replayed} duels.",
+            ephemeral=True
+        )
 
 
 async def setup(bot):
@@ -3,21 +3,25 @@ import random
 import asyncio
 from discord import app_commands
 from discord.ext import commands
-import math
+import logging
 
-# Import the database getter function
-from cogs.settings import get_game_channel_db
+from utils.bracket import Bracket
+from utils.checks import game_channel_only
+from utils.outbox import Priority
 
 import config
 
+logger = logging.getLogger(__name__)
+
 
 class Tournament(commands.Cog):
     """Cog for handling tournaments in QuickDraw Showdown."""
     
     def __init__(self, bot):
         self.bot = bot
-        self.participants = {}  # Format: {guild_id: [user_id1, user_id2, ...]}
+        self.participants = {}  # Format: {guild_id: {user_id1: None, user_id2: None, ...}} (insertion-ordered set)
         self.active_tournaments = set()  # Set of guild IDs with active tournaments
+        self.resume_tasks = set()  # Tasks finishing tournaments interrupted by a restart
         self.duel_outcomes = [
             "{loser} got distracted by a tumbleweed. {winner} wins!",
             "{loser} tried to draw but dropped their revolver!",
@@ -31,34 +35,41 @@ class Tournament(commands.Cog):
             "{winner} shot with deadly precision. {loser} never saw it coming."
         ]
     
-    async def update_stats(self, winner_id, loser_id):
-        """Update player statistics after a duel. Used by the Duel cog as well."""
-        # Import here to avoid circular imports
-        from cogs.duel import Duel
-        duel_cog = self.bot.get_cog('Duel')
-        if duel_cog:
-            await duel_cog.update_stats(winner_id, loser_id)
+    async def cog_unload(self):
+        for task in self.resume_tasks:
+            task.cancel()
+    
+    async def checkpoint(self, guild_id, round_num, results):
+        """Append decided (match_num, winner_id) results to the guild's tournament journal."""
+        try:
+            await self.bot.tournament_journal.record(guild_id, round_num, results)
+        except Exception as e:
+            logger.error(f"Error checkpointing tournament for guild {guild_id}: {e}", exc_info=True)
+    
+    async def update_stats(self, winner_id, loser_id, guild_id):
+        """Update player statistics after a tournament match."""
+        try:
+            await self.bot.stats_store.record_result(winner_id, loser_id, guild_id, source='tournament')
+        except Exception as e:
+            logger.error(f"Error updating stats: {e}", exc_info=True)
+    
+    async def update_stats_batch(self, results, guild_id, source='tournament'):
+        """Update player statistics for many (winner_id, loser_id) matches in one write."""
+        try:
+            await self.bot.stats_store.record_results(results, guild_id, source)
+        except Exception as e:
+            logger.error(f"Error updating stats: {e}", exc_info=True)
     
     @app_commands.command(name="join_tournament", description="Join the next tournament")
+    @game_channel_only()
     async def join_tournament(self, interaction: discord.Interaction):
         """Join the upcoming tournament in this server."""
-        # NEW CHECK:
         guild_id = interaction.guild_id
-        allowed_channel_id = await self.bot.loop.run_in_executor(
-            None, get_game_channel_db, guild_id
-        )
-        if allowed_channel_id is not None and interaction.channel_id != allowed_channel_id:
-            await interaction.response.send_message(
-                f"This command can only be used in <#{allowed_channel_id}>!",
-                ephemeral=True
-            )
-            return
-
         user_id = interaction.user.id
         
         # Initialize guild in participants dict if not present
         if guild_id not in self.participants:
-            self.participants[guild_id] = []
+            self.participants[guild_id] = {}
         
         # Check if tournament is already active
         if guild_id in self.active_tournaments:
@@ -77,7 +88,7 @@ class Tournament(commands.Cog):
             return
         
         # Add user to tournament
-        self.participants[guild_id].append(user_id)
+        self.participants[guild_id][user_id] = None
         count = len(self.participants[guild_id])
         
         await interaction.response.send_message(
@@ -85,22 +96,24 @@ class Tournament(commands.Cog):
         )
     
     @app_commands.command(name="start_tournament", description="Start the tournament with registered players")
+    @game_channel_only()
+    @app_commands.describe(
+        simultaneous="Play each round's matches at the same time on one shared board",
+        simulate="Resolve the whole bracket instantly and post the results as one summary"
+    )
     @app_commands.default_permissions(administrator=True)
-    async def start_tournament(self, interaction: discord.Interaction):
+    async def start_tournament(self, interaction: discord.Interaction, simultaneous: bool = False, simulate: bool = False):
         """Start a tournament with all registered players."""
-        # NEW CHECK:
         guild_id = interaction.guild_id
-        allowed_channel_id = await self.bot.loop.run_in_executor(
-            None, get_game_channel_db, guild_id
-        )
-        if allowed_channel_id is not None and interaction.channel_id != allowed_channel_id:
+
+        # A second bracket would replace the running one's journal and share its checkpoints
+        if guild_id in self.active_tournaments:
             await interaction.response.send_message(
-                f"This command can only be used in <#{allowed_channel_id}>!",
+                "A tournament is already in progress!", 
                 ephemeral=True
             )
             return
 
-        # guild_id already defined above
         # Check if enough participants
         if guild_id not in self.participants or len(self.participants[guild_id]) < 2:
             await interaction.response.send_message(
@@ -113,140 +126,346 @@ class Tournament(commands.Cog):
         self.active_tournaments.add(guild_id)
         
         # Get participants
-        participant_ids = self.participants[guild_id].copy()
-        random.shuffle(participant_ids)  # Randomize bracket order
+        participant_ids = list(self.participants[guild_id])
+        random.shuffle(participant_ids)  # Randomize seeding
+        bracket = Bracket.seeded(participant_ids)
         
-        # Create initial embed with participants
-        embed = discord.Embed(
-            title="🏆 QuickDraw Tournament",
-            description="The tournament is about to begin!",
-            color=discord.Color.gold()
-        )
+        try:
+            if simulate:
+                await self.simulate_tournament(interaction, bracket)
+                return
+            
+            # Name lookups may need several gateway queries, so acknowledge the command first
+            await interaction.response.defer()
+            
+            try:
+                await self.bot.tournament_journal.start(guild_id, interaction.channel_id, simultaneous, bracket)
+            except Exception as e:
+                logger.error(f"Error starting tournament journal for guild {guild_id}: {e}", exc_info=True)
+            
+            # Create initial embed with participants
+            embed = discord.Embed(
+                title="🏆 QuickDraw Tournament",
+                description="The tournament is about to begin!",
+                color=discord.Color.gold()
+            )
+            
+            names = await self.bot.members.display_names(interaction.guild, participant_ids)
+            embed.add_field(name="Participants", value=seed_list(participant_ids, names))
+            
+            await interaction.followup.send(embed=embed)
+            await asyncio.sleep(2)
+            
+            # Run the tournament
+            await self.play_tournament(guild_id, interaction.channel, bracket, simultaneous)
+        except Exception:
+            # Never leave the guild stuck with a tournament "in progress" that nothing is running
+            await self.abandon_tournament(guild_id)
+            raise
+    
+    async def abandon_tournament(self, guild_id):
+        """Mark a guild's tournament as over after it failed, keeping registrations for a retry."""
+        self.active_tournaments.discard(guild_id)
+        try:
+            await self.bot.tournament_journal.finish(guild_id)
+        except Exception as e:
+            logger.error(f"Error removing tournament journal for guild {guild_id}: {e}", exc_info=True)
+    
+    async def play_tournament(self, guild_id, channel, bracket, simultaneous):
+        """Run a bracket to the end, then clear the guild's registration and journal."""
+        await self.run_tournament(channel, bracket, simultaneous)
+        
+        # Clear participant list and mark tournament as inactive
+        self.participants[guild_id] = {}
+        self.active_tournaments.discard(guild_id)
+        try:
+            await self.bot.tournament_journal.finish(guild_id)
+        except Exception as e:
+            logger.error(f"Error removing tournament journal for guild {guild_id}: {e}", exc_info=True)
+    
+    async def simulate_tournament(self, interaction, bracket):
+        """Resolve a whole bracket at once, commit every result in one write and post one summary."""
+        guild_id = interaction.guild_id
+        # Name lookups may need the gateway, so acknowledge the command first
+        await interaction.response.defer()
         
-        participants_str = ""
-        for i, pid in enumerate(participant_ids, 1):
-            member = interaction.guild.get_member(pid)
-            name = member.display_name if member else f"Unknown Gunslinger ({pid})"
-            participants_str += f"{i}. {name}\n"
+        results = []
+        for round_num in range(1, bracket.rounds + 1):
+            for match_num, player1_id, player2_id in bracket.matches(round_num):
+                winner_id, loser_id = self.pick_winner(player1_id, player2_id)
+                bracket.record(round_num, match_num, winner_id)
+                results.append((winner_id, loser_id))
         
-        embed.add_field(name="Participants", value=participants_str)
+        await self.update_stats_batch(results, guild_id, source='simulated')
         
-        # Calculate number of rounds needed
-        num_participants = len(participant_ids)
-        num_rounds = math.ceil(math.log2(num_participants))
+        # Registration reopens as soon as the results are in
+        self.participants[guild_id] = {}
+        self.active_tournaments.discard(guild_id)
         
-        await interaction.response.send_message(embed=embed)
-        await asyncio.sleep(2)
+        names = await self.bot.members.display_names(interaction.guild, bracket.players)
+        pages = BracketPages(bracket_embeds(bracket, names))
+        pages.message = await interaction.followup.send(embed=pages.embeds[0], view=pages, wait=True)
+    
+    async def resume_tournaments(self):
+        """Schedule every tournament left unfinished by a restart. Called from setup_hook."""
+        for saved in await self.bot.tournament_journal.load_all():
+            # With several shard processes, only the shard that owns the guild resumes it
+            if (saved.guild_id >> 22) % (self.bot.shard_count or 1) != (self.bot.shard_id or 0):
+                continue
+            self.active_tournaments.add(saved.guild_id)
+            task = asyncio.create_task(self.resume_tournament(saved))
+            self.resume_tasks.add(task)
+            task.add_done_callback(self.resume_tasks.discard)
+    
+    async def resume_tournament(self, saved):
+        """Wait for the gateway, then finish a tournament from its last checkpoint."""
+        await self.bot.wait_until_ready()
+        channel = self.bot.get_channel(saved.channel_id)
+        if channel is None:
+            logger.warning(f"Dropping tournament for guild {saved.guild_id}: channel {saved.channel_id} is gone")
+            self.active_tournaments.discard(saved.guild_id)
+            await self.bot.tournament_journal.finish(saved.guild_id)
+            return
         
-        # Run the tournament
-        await self.run_tournament(interaction.channel, participant_ids, num_rounds)
+        logger.info(f"Resuming tournament for guild {saved.guild_id} at round {saved.bracket.current_round}")
+        if saved.bracket.current_round is not None:
+            await self.bot.outbox.send(
+                channel, f"🔄 The tournament is back on! Picking up in round {saved.bracket.current_round}."
+            )
+        try:
+            await self.play_tournament(saved.guild_id, channel, saved.bracket, saved.simultaneous)
+        except Exception as e:
+            logger.error(f"Error resuming tournament for guild {saved.guild_id}: {e}", exc_info=True)
+    
+    async def run_tournament(self, channel, bracket, simultaneous=False):
+        """Play out a bracket round by round and announce the champion."""
+        # Resolve every participant once up front instead of per match
+        members = await self.bot.members.resolve(channel.guild, bracket.players)
+        names = {
+            pid: member.display_name if member else f"Unknown ({pid})"
+            for pid, member in members.items()
+        }
         
-        # Clear participant list and mark tournament as inactive
-        self.participants[guild_id] = []
-        self.active_tournaments.remove(guild_id)
-    
-    async def run_tournament(self, channel, participants, num_rounds):
-        """Run the tournament with the given participants."""
-        round_num = 1
-        current_round_participants = participants
-        
-        # Add byes if needed to make the number of participants a power of 2
-        target_count = 2 ** num_rounds
-        while len(current_round_participants) < target_count:
-            current_round_participants.append(None)  # None represents a "bye"
-        
-        # Run each round
-        while round_num <= num_rounds:
-            await channel.send(f"## Round {round_num}")
+        # Run each remaining round (byes were already resolved when the bracket was seeded)
+        while (round_num := bracket.current_round) is not None:
+            await self.bot.outbox.send(channel, f"## Round {round_num}")
             await asyncio.sleep(1)
             
-            next_round_participants = []
-            matches = []
-            
-            # Create matches for this round
-            for i in range(0, len(current_round_participants), 2):
-                if i+1 < len(current_round_participants):
-                    matches.append((current_round_participants[i], current_round_participants[i+1]))
+            matches = bracket.matches(round_num)
             
-            # Run each match
-            for match_num, (player1_id, player2_id) in enumerate(matches, 1):
-                # Handle byes
-                if player1_id is None:
-                    next_round_participants.append(player2_id)
-                    continue
-                if player2_id is None:
-                    next_round_participants.append(player1_id)
-                    continue
-                
-                # Get player objects
-                player1 = channel.guild.get_member(player1_id)
-                player2 = channel.guild.get_member(player2_id)
-                
-                player1_name = player1.display_name if player1 else f"Unknown ({player1_id})"
-                player2_name = player2.display_name if player2 else f"Unknown ({player2_id})"
-                
-                # Announce match
-                await channel.send(f"### Match {match_num}: {player1_name} vs {player2_name}")
-                await asyncio.sleep(1.5)
-                
-                # Countdown
-                countdown_msg = await channel.send("Get ready...")
-                for i in range(3, 0, -1):
-                    await countdown_msg.edit(content=f"Get ready... {i}")
-                    await asyncio.sleep(1)
-                
-                await countdown_msg.edit(content="**DRAW!** 🔫")
-                await asyncio.sleep(1.5)
-                
-                # Determine winner (random for now)
-                if random.random() < 0.5:
-                    winner, loser = player1, player2
-                    winner_id, loser_id = player1_id, player2_id
-                else:
-                    winner, loser = player2, player1
-                    winner_id, loser_id = player2_id, player1_id
-                
-                # Get a random outcome message
-                outcome = random.choice(self.duel_outcomes)
-                winner_name = winner.display_name if winner else f"Unknown ({winner_id})"
-                loser_name = loser.display_name if loser else f"Unknown ({loser_id})"
-                outcome = outcome.format(winner=winner_name, loser=loser_name)
-                
-                # Send the result
-                await channel.send(f"💥 {outcome}")
-                await channel.send(f"🏆 {winner_name} advances to the next round!")
-                
-                # Update stats
-                await self.update_stats(winner_id, loser_id)
-                
-                # Add winner to next round
-                next_round_participants.append(winner_id)
-                
-                # Pause between matches
-                await asyncio.sleep(2)
-            
-            # Update for next round
-            current_round_participants = next_round_participants
-            round_num += 1
-            
-            # If we have a winner, end the tournament
-            if len(current_round_participants) == 1:
-                winner_id = current_round_participants[0]
-                winner = channel.guild.get_member(winner_id)
-                winner_name = winner.display_name if winner else f"Unknown ({winner_id})"
-                
-                # Create winner embed
-                embed = discord.Embed(
-                    title="🏆 Tournament Champion 🏆",
-                    description=f"**{winner_name}** is the fastest gunslinger in the West!",
-                    color=discord.Color.gold()
+            # Run the matches, either together or one after another, checkpointing each result.
+            # Checkpoints go to the journal before stats are written, so a crash in between
+            # can never make a resumed tournament replay a match and count it twice
+            if simultaneous:
+                winners = await self.run_round_simultaneous(channel, matches, names)
+                for match_num, winner_id in winners.items():
+                    bracket.record(round_num, match_num, winner_id)
+                await self.checkpoint(channel.guild.id, round_num, winners.items())
+                await self.update_stats_batch(
+                    [(winners[match_num], player2_id if winners[match_num] == player1_id else player1_id)
+                     for match_num, player1_id, player2_id in matches],
+                    channel.guild.id
                 )
                 
-                if winner and winner.avatar:
-                    embed.set_thumbnail(url=winner.avatar.url)
-                
-                await channel.send(embed=embed)
-                break
+                # Pause between rounds
+                await asyncio.sleep(2)
+            else:
+                for match_num, player1_id, player2_id in matches:
+                    winner_id = await self.run_match(channel, match_num, player1_id, player2_id, names)
+                    bracket.record(round_num, match_num, winner_id)
+                    await self.checkpoint(channel.guild.id, round_num, [(match_num, winner_id)])
+                    loser_id = player2_id if winner_id == player1_id else player1_id
+                    await self.update_stats(winner_id, loser_id, channel.guild.id)
+                    
+                    # Pause between matches
+                    await asyncio.sleep(2)
+        
+        winner_id = bracket.champion
+        winner = members[winner_id]
+        winner_name = names[winner_id]
+        
+        # Create winner embed
+        embed = discord.Embed(
+            title="🏆 Tournament Champion 🏆",
+            description=f"**{winner_name}** is the fastest gunslinger in the West!",
+            color=discord.Color.gold()
+        )
+        
+        if winner and winner.avatar:
+            embed.set_thumbnail(url=winner.avatar.url)
+        
+        await self.bot.outbox.send(channel, embed=embed, priority=Priority.RESULT)
+    
+    def pick_winner(self, player1_id, player2_id):
+        """Determine a match's (winner_id, loser_id) (random for now)."""
+        if random.random() < 0.5:
+            return player1_id, player2_id
+        return player2_id, player1_id
+    
+    async def run_match(self, channel, match_num, player1_id, player2_id, names):
+        """Play a single match with its own countdown and return the winner's ID."""
+        outbox = self.bot.outbox
+        
+        # Announce match
+        await outbox.send(channel, f"### Match {match_num}: {names[player1_id]} vs {names[player2_id]}")
+        await asyncio.sleep(1.5)
+        
+        # Countdown (ticks are cosmetic and may be dropped if the channel is busy)
+        countdown_msg = await outbox.send(channel, "Get ready...", coalesce=False)
+        for i in range(3, 0, -1):
+            outbox.edit(countdown_msg, content=f"Get ready... {i}")
+            await asyncio.sleep(1)
+        
+        # Same priority as the result, so the result can never overtake the draw
+        outbox.edit(countdown_msg, content="**DRAW!** 🔫", priority=Priority.RESULT)
+        await asyncio.sleep(1.5)
+        
+        winner_id, loser_id = self.pick_winner(player1_id, player2_id)
+        
+        # Get a random outcome message
+        outcome = random.choice(self.duel_outcomes)
+        winner_name = names[winner_id]
+        loser_name = names[loser_id]
+        outcome = outcome.format(winner=winner_name, loser=loser_name)
+        
+        # Send the result (queued together so the outbox can merge them)
+        await asyncio.gather(
+            outbox.send(channel, f"💥 {outcome}", priority=Priority.RESULT),
+            outbox.send(channel, f"🏆 {winner_name} advances to the next round!", priority=Priority.RESULT)
+        )
+        return winner_id
+    
+    async def run_round_simultaneous(self, channel, matches, names):
+        """Play every match of a round at once on one shared, live-updating board.
+        
+        Returns {match_num: winner_id}; the caller checkpoints the round and
+        then commits its stats in a single batch.
+        """
+        if not matches:
+            return {}
+        
+        outbox = self.bot.outbox
+        
+        # Announce all matches on one board (split to respect the message size limit)
+        lines = [f"**Match {match_num}:** {names[p1]} vs {names[p2]}" for match_num, p1, p2 in matches]
+        boards = [await outbox.send(channel, chunk, coalesce=False) for chunk in chunk_lines(lines)]
+        await asyncio.sleep(1.5)
+        
+        # One shared countdown for the whole round
+        countdown_msg = await outbox.send(channel, "Get ready...", coalesce=False)
+        for i in range(3, 0, -1):
+            outbox.edit(countdown_msg, content=f"Get ready... {i}")
+            await asyncio.sleep(1)
+        
+        # Same priority as the result, so the result can never overtake the draw
+        outbox.edit(countdown_msg, content="**DRAW!** 🔫", priority=Priority.RESULT)
+        await asyncio.sleep(1.5)
+        
+        winners = {}
+        result_lines = []
+        for match_num, player1_id, player2_id in matches:
+            winner_id, loser_id = self.pick_winner(player1_id, player2_id)
+            winners[match_num] = winner_id
+            outcome = random.choice(self.duel_outcomes).format(winner=names[winner_id], loser=names[loser_id])
+            result_lines.append(f"**Match {match_num}:** 💥 {outcome} 🏆 {names[winner_id]} advances!")
+        
+        # Reveal every result by editing the board in place
+        result_chunks = chunk_lines(result_lines)
+        await asyncio.gather(
+            *(outbox.edit(board, content=chunk, priority=Priority.RESULT) for board, chunk in zip(boards, result_chunks)),
+            *(outbox.send(channel, chunk, priority=Priority.RESULT) for chunk in result_chunks[len(boards):])
+        )
+        return winners
+
+
+class BracketPages(discord.ui.View):
+    """Previous/next buttons for paging through a simulated bracket's results."""
+    
+    def __init__(self, embeds, timeout=600):
+        super().__init__(timeout=timeout)
+        self.embeds = embeds
+        self.page = 0
+        self.message = None
+        self.update_buttons()
+    
+    def update_buttons(self):
+        self.previous_page.disabled = self.page == 0
+        self.next_page.disabled = self.page >= len(self.embeds) - 1
+    
+    async def show(self, interaction, page):
+        self.page = page
+        self.update_buttons()
+        await interaction.response.edit_message(embed=self.embeds[page], view=self)
+    
+    @discord.ui.button(label="◀", style=discord.ButtonStyle.secondary)
+    async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.show(interaction, max(0, self.page - 1))
+    
+    @discord.ui.button(label="▶", style=discord.ButtonStyle.secondary)
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.show(interaction, min(len(self.embeds) - 1, self.page + 1))
+    
+    async def on_timeout(self):
+        # Drop the buttons once nobody can use them any more
+        if self.message is not None:
+            try:
+                await self.message.edit(view=None)
+            except discord.HTTPException:
+                pass
+
+
+def bracket_embeds(bracket, names, limit=3900):
+    """Render a finished bracket as embed pages, round by round, each under the description limit."""
+    lines = []
+    for round_num in range(1, bracket.rounds + 1):
+        title = "Final" if round_num == bracket.rounds else f"Round {round_num}"
+        lines.append(f"__**{title}**__")
+        for match_num, player1_id, player2_id, winner_id in bracket.results(round_num):
+            if player1_id is None or player2_id is None:
+                lines.append(f"`{match_num:>4}` {names[winner_id]} advances (bye)")
+            else:
+                loser_id = player2_id if winner_id == player1_id else player1_id
+                lines.append(f"`{match_num:>4}` **{names[winner_id]}** def. {names[loser_id]}")
+    
+    pages = chunk_lines(lines, limit)
+    champion = names[bracket.champion]
+    embeds = []
+    for page_num, page in enumerate(pages, 1):
+        embed = discord.Embed(title="🏆 Tournament Results", description=page, color=discord.Color.gold())
+        embed.add_field(name="Champion", value=f"**{champion}** is the fastest gunslinger in the West!")
+        embed.set_footer(text=f"Page {page_num}/{len(pages)} · {len(bracket)} gunslingers")
+        embeds.append(embed)
+    return embeds
+
+
+def seed_list(participant_ids, names, limit=1024):
+    """Numbered participant list for an embed field, cut short to fit the field limit."""
+    lines = []
+    length = 0
+    for i, pid in enumerate(participant_ids, 1):
+        line = f"{i}. {names[pid]}"
+        remaining = len(participant_ids) - i
+        # Keep room for the "...and N more" footer if anyone would be left out
+        if length + len(line) + 1 > limit - (30 if remaining else 0):
+            lines.append(f"...and {len(participant_ids) - len(lines)} more")
+            break
+        lines.append(line)
+        length += len(line) + 1
+    return "\n".join(lines)
+
+
+def chunk_lines(lines, limit=1900):
+    """Join lines into as few messages as possible, each under Discord's length limit."""
+    chunks = []
+    current = ""
+    for line in lines:
+        if current and len(current) + len(line) + 1 > limit:
+            chunks.append(current)
+            current = ""
+        current = f"{current}\n{line}" if current else line
+    if current:
+        chunks.append(current)
+    return chunks
 
 
 async def setup(bot):
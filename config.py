@@ -10,7 +10,78 @@ ADMIN_IDS = [1087826581285769217] # User ID added
 # Command Prefix (if not using slash commands exclusively)
 COMMAND_PREFIX = '/'
 
-# Data file path
+# Data file path (legacy JSON stats, migrated into STATS_DB_FILE on first start)
 DATA_FILE = 'data/stats.json'
 
+# SQLite database holding per-player stats
+STATS_DB_FILE = 'data/stats.db'
+
+# Player rows the Stats cog keeps in memory to answer /stats without a database read
+STATS_CACHE_SIZE = 10000
+
+# Seconds a rendered /leaderboard is reused before it is refreshed to pick up renamed members
+LEADERBOARD_CACHE_TTL = 300
+
+# Seconds the public JSON stats API (/api/...) reuses a response before rebuilding it,
+# and the most leaderboard rows it returns per page
+STATS_API_TTL = 10
+STATS_API_MAX_PAGE_SIZE = 100
+
+# Seconds of duel events kept in the stats event log before they are folded into
+# the snapshot, and seconds between compaction passes
+EVENT_LOG_RETENTION = 30 * 24 * 3600
+EVENT_LOG_COMPACT_INTERVAL = 3600
+
+# SQLite database holding per-guild settings, and the size of its dedicated thread pool
+SETTINGS_DB_FILE = 'data/settings.db'
+SETTINGS_DB_WORKERS = 2
+
+# Directory of append-only journals used to resume tournaments after a restart
+TOURNAMENT_DIR = 'data/tournaments'
+
+# Guild the slash commands are synced to, and whether to sync on boot even if the
+# command tree is unchanged since the last sync (e.g. after deleting commands by hand)
+COMMAND_SYNC_GUILD_ID = int(os.getenv('COMMAND_SYNC_GUILD_ID', '1363216998879723590'))
+FORCE_COMMAND_SYNC = os.getenv('FORCE_COMMAND_SYNC') == '1'
+
+# Lean member cache: keep no guild member lists (no chunking at startup, gateway member
+# cache limited to the bot itself) and remember only members the game touches, in an LRU
+# of MEMBER_CACHE_SIZE entries that are refreshed after MEMBER_CACHE_TTL seconds
+LEAN_MEMBER_CACHE = os.getenv('LEAN_MEMBER_CACHE') == '1'
+MEMBER_CACHE_SIZE = 5000
+MEMBER_CACHE_TTL = 300
+
+# Seconds a /duel challenge waits for /accept before it expires
+CHALLENGE_TIMEOUT = 120
+
+# /queue matchmaking: rating gap accepted on joining, how many points it widens per second
+# waited, the widest gap ever accepted, and seconds before a queued player gives up
+QUEUE_BASE_RANGE = 100
+QUEUE_WIDEN_RATE = 5
+QUEUE_MAX_RANGE = 500
+QUEUE_TIMEOUT = 300
+
+# Requests per second Discord allows the bot across all shards
+GLOBAL_RATE_LIMIT = 50
+
+# Seconds the event loop may go without running a callback before the watchdog logs
+# what is blocking it
+LOOP_LAG_THRESHOLD = 0.25
+
+# Bearer token for the admin-only HTTP endpoints (e.g. /debug/profile); unset disables them
+ADMIN_API_TOKEN = os.getenv('ADMIN_API_TOKEN')
+
+# Longest sampling profile /debug/profile will capture, in seconds
+PROFILE_MAX_SECONDS = 30
+
+# --- Sharding (see launcher.py) ---
+# Number of shard processes launcher.py starts when --shards is not given
+SHARD_COUNT = int(os.getenv('SHARD_COUNT', '1'))
+
+# Seconds between checks for stats written by other shard processes
+SHARD_SYNC_INTERVAL = 2.0
+
+# Seconds without a heartbeat before the launcher reports a shard unhealthy
+SHARD_HEARTBEAT_TIMEOUT = 30
+
 # GAME_CHANNEL_ID removed - settings are now per-guild in database
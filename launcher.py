@@ -0,0 +1,205 @@
+"""Runs QuickDraw Showdown as several shard processes.
+
+Usage:
+    python launcher.py --shards 4
+    python launcher.py --shards 2 --fake-gateway   # local test without Discord
+
+Each shard is a separate QuickDrawBot process owning a slice of the guilds,
+so each gets its own event loop and core. Shards share state through the
+SQLite files in data/: settings.db for per-guild settings and stats.db for
+player stats, which every shard polls for the others' writes. Pending
+challenges stay in the shard that owns the guild, since Discord routes all
+of a guild's interactions to that one shard.
+
+The launcher itself serves the health endpoints on PORT, built from
+heartbeats each shard sends over a queue, and restarts shards that die.
+Each shard serves the bot's own endpoints (/ready, /metrics, /api/...) on
+PORT + 1 + shard_id.
+"""
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import queue
+import random
+import time
+
+from aiohttp import web
+
+import config
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s:%(levelname)s:%(name)s: %(message)s')
+logger = logging.getLogger('launcher')
+
+HEARTBEAT_INTERVAL = 5
+
+
+# --- Shard process side ---
+
+async def report_health(bot, shard_id, status_queue, fake_gateway, web_port):
+    """Sends this shard's health to the launcher every few seconds."""
+    while True:
+        if fake_gateway:
+            ready, latency = True, random.uniform(0.03, 0.08)
+        else:
+            ready, latency = bot.is_ready(), bot.latency
+        status_queue.put({
+            'shard_id': shard_id,
+            'pid': os.getpid(),
+            'ready': ready,
+            'latency': latency if latency == latency else None,  # NaN before the first heartbeat
+            'guilds': len(bot.guilds),
+            'pending_challenges': len(bot.get_cog('Duel').challenges) if bot.get_cog('Duel') else 0,
+            'outbox_depth': bot.outbox.depth,
+            'web_port': web_port,
+            'timestamp': time.time(),
+        })
+        await asyncio.sleep(HEARTBEAT_INTERVAL)
+
+
+async def shard_main(shard_id, shard_count, status_queue, fake_gateway):
+    # Imported here so the launcher process never builds a bot itself
+    from bot import QuickDrawBot, run_web_server, web_port
+
+    bot = QuickDrawBot(shard_id=shard_id, shard_count=shard_count)
+    reporter = asyncio.create_task(
+        report_health(bot, shard_id, status_queue, fake_gateway, web_port(shard_id))
+    )
+    try:
+        async with bot:
+            # /ready, /metrics, /debug/profile, /api/* and /admin/export/* for this shard
+            await run_web_server(bot)
+            if fake_gateway:
+                # Load cogs and open shared state, then stand in for the gateway connection
+                await bot.setup_hook()
+                logger.info(f'Shard {shard_id} running with a fake gateway')
+                await asyncio.Event().wait()
+            else:
+                await bot.start(config.BOT_TOKEN)
+    finally:
+        reporter.cancel()
+
+
+def run_shard(shard_id, shard_count, status_queue, fake_gateway):
+    """Process entry point for one shard."""
+    try:
+        asyncio.run(shard_main(shard_id, shard_count, status_queue, fake_gateway))
+    except KeyboardInterrupt:
+        pass
+
+
+# --- Launcher side ---
+
+class ShardSupervisor:
+    """Starts shard processes, collects their heartbeats and restarts any that exit."""
+
+    def __init__(self, shard_count: int, fake_gateway: bool = False, restart_delay: float = 5.0):
+        self.shard_count = shard_count
+        self.fake_gateway = fake_gateway
+        self.restart_delay = restart_delay
+        self._context = multiprocessing.get_context('spawn')
+        self.status_queue = self._context.Queue()
+        self.processes = {}  # Format: {shard_id: Process}
+        self.status = {}  # Format: {shard_id: last heartbeat dict}
+        self.restarts = {shard_id: 0 for shard_id in range(shard_count)}
+
+    def start_shard(self, shard_id):
+        process = self._context.Process(
+            target=run_shard,
+            args=(shard_id, self.shard_count, self.status_queue, self.fake_gateway),
+            name=f'quickdraw-shard-{shard_id}',
+            daemon=True
+        )
+        process.start()
+        self.processes[shard_id] = process
+        logger.info(f'Started shard {shard_id}/{self.shard_count} (pid {process.pid})')
+
+    def drain_heartbeats(self):
+        while True:
+            try:
+                heartbeat = self.status_queue.get_nowait()
+            except queue.Empty:
+                return
+            self.status[heartbeat['shard_id']] = heartbeat
+
+    def is_healthy(self, shard_id) -> bool:
+        heartbeat = self.status.get(shard_id)
+        process = self.processes.get(shard_id)
+        return (
+            process is not None and process.is_alive()
+            and heartbeat is not None and heartbeat['ready']
+            and time.time() - heartbeat['timestamp'] < config.SHARD_HEARTBEAT_TIMEOUT
+        )
+
+    def report(self) -> dict:
+        shards = []
+        for shard_id in range(self.shard_count):
+            heartbeat = self.status.get(shard_id, {})
+            shards.append({
+                'shard_id': shard_id,
+                'healthy': self.is_healthy(shard_id),
+                'restarts': self.restarts[shard_id],
+                'last_heartbeat_age': round(time.time() - heartbeat['timestamp'], 1) if heartbeat else None,
+                **{k: v for k, v in heartbeat.items() if k not in ('shard_id', 'timestamp')},
+            })
+        return {'shard_count': self.shard_count, 'healthy': all(s['healthy'] for s in shards), 'shards': shards}
+
+    async def supervise(self):
+        for shard_id in range(self.shard_count):
+            self.start_shard(shard_id)
+        while True:
+            await asyncio.sleep(1)
+            self.drain_heartbeats()
+            for shard_id, process in list(self.processes.items()):
+                if not process.is_alive():
+                    logger.error(f'Shard {shard_id} exited with code {process.exitcode}, restarting in {self.restart_delay}s')
+                    self.status.pop(shard_id, None)
+                    del self.processes[shard_id]
+                    self.restarts[shard_id] += 1
+                    asyncio.get_running_loop().call_later(self.restart_delay, self.start_shard, shard_id)
+
+    def stop(self):
+        for process in self.processes.values():
+            process.terminate()
+        for process in self.processes.values():
+            process.join(timeout=10)
+
+
+async def run_launcher_web_server(supervisor):
+    async def health_check(request):
+        healthy = supervisor.report()['healthy']
+        return web.Response(text="Bot is running" if healthy else "Shards unhealthy", status=200 if healthy else 503)
+
+    async def shards_status(request):
+        return web.json_response(supervisor.report())
+
+    app = web.Application()
+    app.router.add_get('/', health_check)
+    app.router.add_get('/shards', shards_status)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    port = int(os.environ.get('PORT', 10000))
+    site = web.TCPSite(runner, '0.0.0.0', port)
+    await site.start()
+    logger.info(f"Launcher web server started on port {port}")
+
+
+async def main(shard_count, fake_gateway):
+    supervisor = ShardSupervisor(shard_count, fake_gateway=fake_gateway)
+    await run_launcher_web_server(supervisor)
+    try:
+        await supervisor.supervise()
+    finally:
+        supervisor.stop()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run QuickDraw Showdown as multiple shard processes.')
+    parser.add_argument('--shards', type=int, default=config.SHARD_COUNT, help='Number of shard processes')
+    parser.add_argument('--fake-gateway', action='store_true', help='Run shards without connecting to Discord')
+    args = parser.parse_args()
+    try:
+        asyncio.run(main(args.shards, args.fake_gateway))
+    except KeyboardInterrupt:
+        pass
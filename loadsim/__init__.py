@@ -0,0 +1,8 @@
+"""Headless load simulator and benchmarks for the QuickDraw Showdown cogs.
+
+Runs the real Duel, Stats, Tournament and Settings cogs against in-process
+stand-ins for Discord objects on an event loop with a virtual clock, so
+countdown sleeps cost nothing and thousands of duels finish in seconds.
+
+    python -m loadsim --help
+"""
@@ -0,0 +1,105 @@
+# loadsim/__main__.py
+import argparse
+import json
+import logging
+import sys
+import tempfile
+
+from loadsim import clock
+from loadsim.harness import run_scenario
+
+SCENARIOS = ('duels', 'queue', 'tournament', 'leaderboard', 'settings')
+# Loop lag below this is scheduler noise and never counts as a regression
+LAG_NOISE_FLOOR_MS = 1.0
+
+
+def print_report(name, report):
+    print(f"\n=== {name} ===")
+    print(f"{report['commands']} commands in {report['wall_seconds']:.2f}s real "
+          f"({report['virtual_seconds']:.0f}s simulated), {report['throughput_per_s']:.0f} commands/s")
+    for command, latency in report['latency'].items():
+        print(f"  /{command:<17} n={latency['count']:<6} p50={latency['p50_ms']:.2f}ms "
+              f"p99={latency['p99_ms']:.2f}ms max={latency['max_ms']:.2f}ms")
+    lag = report['loop_lag_ms']
+    print(f"  loop lag          p50={lag['p50']:.3f}ms p99={lag['p99']:.3f}ms max={lag['max']:.2f}ms")
+    writes = report['stats_writes']
+    print(f"  stats writes      n={writes['count']} mean={writes['mean_ms']:.3f}ms p99={writes['p99_ms']:.3f}ms")
+    messages = report['messages']
+    print(f"  messages          sent={messages['sent']} edits={messages['edits']} "
+          f"coalesced={messages['outbox']['coalesced']} superseded={messages['outbox']['superseded']}")
+    if report['errors']:
+        print(f"  ERRORS            {report['errors']}")
+
+
+def compare(results, baseline, tolerance):
+    """Returns human-readable regressions of results against a baseline report."""
+    regressions = []
+    for name, report in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if report['throughput_per_s'] < base['throughput_per_s'] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {report['throughput_per_s']:.0f}/s "
+                               f"vs baseline {base['throughput_per_s']:.0f}/s")
+        for command, latency in report['latency'].items():
+            base_latency = base['latency'].get(command)
+            if base_latency and latency['p99_ms'] > base_latency['p99_ms'] * (1 + tolerance):
+                regressions.append(f"{name}: /{command} p99 {latency['p99_ms']:.2f}ms "
+                                   f"vs baseline {base_latency['p99_ms']:.2f}ms")
+        lag_limit = max(base['loop_lag_ms']['p99'] * (1 + tolerance), LAG_NOISE_FLOOR_MS)
+        if report['loop_lag_ms']['p99'] > lag_limit:
+            regressions.append(f"{name}: loop lag p99 {report['loop_lag_ms']['p99']:.3f}ms "
+                               f"vs baseline {base['loop_lag_ms']['p99']:.3f}ms")
+        if report['errors']:
+            regressions.append(f"{name}: command errors {report['errors']}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m loadsim', description='Headless load simulation for the QuickDraw cogs.')
+    parser.add_argument('scenarios', nargs='*', metavar='scenario',
+                        help=f"Scenarios to run: {', '.join(SCENARIOS)} (default: all)")
+    parser.add_argument('--duels', type=int, default=2000, help='Duels in the duel and queue storms')
+    parser.add_argument('--guilds', type=int, default=20, help='Guilds in the duel and queue storms')
+    parser.add_argument('--players', type=int, default=200, help='Players per guild')
+    parser.add_argument('--tournament-players', type=int, default=256, help='Tournament entrants')
+    parser.add_argument('--simultaneous', action='store_true', help='Play tournament rounds simultaneously')
+    parser.add_argument('--simulate', action='store_true', help='Resolve the tournament instantly (simulate mode)')
+    parser.add_argument('--requests', type=int, default=5000, help='Requests in the leaderboard and settings storms')
+    parser.add_argument('--toggles', type=int, default=20, help='Game channel changes in the settings churn')
+    parser.add_argument('--json', metavar='PATH', help='Write the full report as JSON')
+    parser.add_argument('--baseline', metavar='PATH', help='Fail if results regress against this JSON report')
+    parser.add_argument('--tolerance', type=float, default=0.5, help='Allowed relative regression (default 0.5)')
+    parser.add_argument('--verbose', action='store_true', help='Show bot logging')
+    options = parser.parse_args(argv)
+    unknown = set(options.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(sorted(unknown))}")
+
+    logging.getLogger().setLevel(logging.INFO if options.verbose else logging.WARNING)
+
+    results = {}
+    for scenario in options.scenarios or SCENARIOS:
+        with tempfile.TemporaryDirectory(prefix='loadsim-') as data_dir:
+            (harness, wall, virtual), loop = clock.run(run_scenario(data_dir, scenario, options))
+        results[scenario] = harness.report(wall, virtual, loop.iteration_lag)
+        print_report(scenario, results[scenario])
+
+    if options.json:
+        with open(options.json, 'w') as f:
+            json.dump(results, f, indent=4)
+
+    if options.baseline:
+        with open(options.baseline, 'r') as f:
+            regressions = compare(results, json.load(f), options.tolerance)
+        if regressions:
+            print("\nREGRESSIONS:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print("\nNo regressions against baseline.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
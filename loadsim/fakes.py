@@ -0,0 +1,136 @@
+# loadsim/fakes.py
+"""In-process stand-ins for the discord.py objects the cogs touch.
+
+They implement only the attributes and coroutines the cogs actually use.
+Channel sends and edits sleep for a configurable HTTP latency, which costs
+no real time on the virtual clock loop.
+"""
+import asyncio
+import itertools
+
+_ids = itertools.count(900_000_000_000_000_000)
+
+
+def next_id() -> int:
+    return next(_ids)
+
+
+class FakeMember:
+    def __init__(self, guild, name: str, user_id: int | None = None, bot: bool = False):
+        self.id = user_id if user_id is not None else next_id()
+        self.guild = guild
+        self.name = name
+        self.display_name = name
+        self.bot = bot
+        self.avatar = None
+
+    @property
+    def mention(self):
+        return f"<@{self.id}>"
+
+
+class FakeMessage:
+    def __init__(self, channel, content=None, embed=None):
+        self.id = next_id()
+        self.channel = channel
+        self.content = content
+        self.embed = embed
+
+    async def edit(self, content=None, **kwargs):
+        await asyncio.sleep(self.channel.http_latency)
+        self.content = content
+        self.channel.edits += 1
+        return self
+
+
+class FakeChannel:
+    def __init__(self, guild, name: str = 'saloon', http_latency: float = 0.05):
+        self.id = next_id()
+        self.guild = guild
+        self.name = name
+        self.http_latency = http_latency
+        self.sent = 0
+        self.edits = 0
+
+    @property
+    def mention(self):
+        return f"<#{self.id}>"
+
+    async def send(self, content=None, *, embed=None, **kwargs):
+        await asyncio.sleep(self.http_latency)
+        self.sent += 1
+        return FakeMessage(self, content, embed)
+
+
+class FakeGuild:
+    def __init__(self, name: str = 'Dusty Gulch'):
+        self.id = next_id()
+        self.name = name
+        self._members = {}
+        self.channels = []
+        self.member_queries = 0
+
+    def add_member(self, name: str) -> FakeMember:
+        member = FakeMember(self, name)
+        self._members[member.id] = member
+        return member
+
+    def add_channel(self, name: str = 'saloon', http_latency: float = 0.05) -> FakeChannel:
+        channel = FakeChannel(self, name, http_latency)
+        self.channels.append(channel)
+        return channel
+
+    @property
+    def members(self):
+        return list(self._members.values())
+
+    def get_member(self, user_id):
+        return self._members.get(user_id)
+
+    async def query_members(self, query=None, *, limit=5, user_ids=None, cache=True, **kwargs):
+        self.member_queries += 1
+        return [self._members[u] for u in user_ids or () if u in self._members][:limit]
+
+
+class FakeResponse:
+    def __init__(self):
+        self._done = False
+        self.messages = []
+
+    def is_done(self):
+        return self._done
+
+    async def send_message(self, content=None, *, embed=None, ephemeral=False, **kwargs):
+        self._done = True
+        self.messages.append((content, embed, ephemeral))
+
+    async def defer(self, **kwargs):
+        self._done = True
+
+
+class FakeFollowup:
+    def __init__(self, channel: FakeChannel):
+        self.channel = channel
+
+    async def send(self, content=None, *, embed=None, wait=False, **kwargs):
+        return await self.channel.send(content, embed=embed)
+
+
+class FakeInteraction:
+    def __init__(self, client, user: FakeMember, channel: FakeChannel):
+        self.client = client
+        self.user = user
+        self.guild = channel.guild
+        self.channel = channel
+        self.response = FakeResponse()
+        self.followup = FakeFollowup(channel)
+        self.extras = {}
+        self.command = None
+
+    @property
+    def guild_id(self):
+        return self.guild.id
+
+    @property
+    def channel_id(self):
+        return self.channel.id
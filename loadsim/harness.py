@@ -0,0 +1,236 @@
+# loadsim/harness.py
+import asyncio
+import logging
+import os
+import random
+import time
+from collections import defaultdict
+
+import discord
+from discord import app_commands
+
+from bot import QuickDrawBot
+from loadsim.fakes import FakeGuild, FakeInteraction
+from utils.guild_settings import GuildSettingsCache
+from utils.settings_db import SettingsDatabase
+from utils.stats_store import StatsStore
+from utils.tournament_journal import TournamentJournal
+
+logger = logging.getLogger(__name__)
+
+SIM_COGS = ('cogs.settings', 'cogs.stats', 'cogs.duel', 'cogs.tournament')
+
+
+def percentile(samples, p):
+    """Nearest-rank percentile of a list of numbers (0 for an empty list)."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+
+class SimBot(QuickDrawBot):
+    """QuickDrawBot wired to a scratch data directory and fake guilds instead of Discord."""
+
+    def __init__(self, data_dir: str):
+        super().__init__()
+        self.stats_store = StatsStore(
+            path=os.path.join(data_dir, 'stats.db'), legacy_file=os.path.join(data_dir, 'stats.json')
+        )
+        self.settings_db = SettingsDatabase(path=os.path.join(data_dir, 'settings.db'))
+        self.guild_settings = GuildSettingsCache(self.settings_db)
+        self.tournament_journal = TournamentJournal(os.path.join(data_dir, 'tournaments'))
+        self.fake_guilds = []
+        self._fake_channels = {}
+
+    async def setup_hook(self):
+        """Opens the scratch databases and loads the game cogs; never syncs commands."""
+        await self.settings_db.open()
+        await self.guild_settings.load()
+        await self.stats_store.open()
+        for cog in SIM_COGS:
+            await self.load_extension(cog)
+
+    def add_guild(self, players: int, channels: int = 1, http_latency: float = 0.05) -> FakeGuild:
+        guild = FakeGuild(f'Guild {len(self.fake_guilds) + 1}')
+        for index in range(players):
+            guild.add_member(f'Gunslinger {index}')
+        for index in range(channels):
+            channel = guild.add_channel(f'saloon-{index}', http_latency)
+            self._fake_channels[channel.id] = channel
+        self.fake_guilds.append(guild)
+        return guild
+
+    def get_channel(self, channel_id):
+        return self._fake_channels.get(channel_id)
+
+
+class LoadHarness:
+    """Drives slash commands through the real cogs and records per-command latency."""
+
+    def __init__(self, bot: SimBot):
+        self.bot = bot
+        self.latencies = defaultdict(list)  # Format: {command_name: [real seconds, ...]}
+        self.errors = defaultdict(int)
+        self.commands = 0
+
+    async def invoke(self, name: str, user, channel, /, **kwargs) -> FakeInteraction:
+        """Runs one app command (checks included) as `user` in `channel`."""
+        command = self.bot.tree.get_command(name)
+        interaction = FakeInteraction(self.bot, user, channel)
+        started = time.perf_counter()
+        try:
+            for check in command.checks:
+                if not await discord.utils.maybe_coroutine(check, interaction):
+                    raise app_commands.CheckFailure()
+            await command.callback(command.binding, interaction, **kwargs)
+        except app_commands.AppCommandError as e:
+            await self.bot.tree.on_error(interaction, e)
+        except Exception as e:
+            self.errors[name] += 1
+            logger.error(f"/{name} raised {e!r}", exc_info=True)
+        finally:
+            self.latencies[name].append(time.perf_counter() - started)
+            self.commands += 1
+        return interaction
+
+    # --- Scenarios ---
+
+    async def duel_storm(self, duels: int, guilds: int, players_per_guild: int):
+        """Runs `duels` challenge/accept pairs, as many at once as there are free player pairs."""
+        lanes = []
+        for _ in range(guilds):
+            guild = self.bot.add_guild(players_per_guild)
+            members = guild.members
+            for i in range(0, len(members) - 1, 2):
+                lanes.append((guild.channels[0], members[i], members[i + 1]))
+        lanes = lanes[:duels]
+
+        async def run_lane(lane_index, channel, challenger, target):
+            for _ in range(lane_index, duels, len(lanes)):
+                await self.invoke('duel', challenger, channel, target=target)
+                await self.invoke('accept', target, channel)
+
+        await asyncio.gather(*(run_lane(i, *lane) for i, lane in enumerate(lanes)))
+
+    async def queue_storm(self, duels: int, guilds: int, players_per_guild: int):
+        """Seeds a spread of ratings, then has 2 * `duels` players /queue at once and waits for every match."""
+        queuers = []
+        for _ in range(guilds):
+            guild = self.bot.add_guild(players_per_guild)
+            members = guild.members
+            results = [(random.choice(members).id, random.choice(members).id) for _ in range(players_per_guild * 5)]
+            await self.bot.stats_store.record_results([(w, l) for w, l in results if w != l], guild.id)
+            queuers.extend((guild.channels[0], member) for member in members)
+        random.shuffle(queuers)
+        queuers = queuers[:duels * 2]
+
+        duel_cog = self.bot.get_cog('Duel')
+        await asyncio.gather(*(self.invoke('queue', member, channel) for channel, member in queuers))
+        # Players left waiting are paired (or time out) as their rating ranges widen
+        while len(duel_cog.queue) or duel_cog.queue_duels:
+            await asyncio.sleep(1)
+
+    async def tournament(self, players: int, simultaneous: bool, simulate: bool = False):
+        """Registers `players` gunslingers in one guild and plays the whole bracket."""
+        guild = self.bot.add_guild(players)
+        channel = guild.channels[0]
+        admin = guild.members[0]
+        for member in guild.members:
+            await self.invoke('join_tournament', member, channel)
+        await self.invoke('start_tournament', admin, channel, simultaneous=simultaneous, simulate=simulate)
+
+    async def leaderboard_storm(self, requests: int, players: int):
+        """Seeds results for `players` gunslingers, then fires /leaderboard and /stats concurrently."""
+        guild = self.bot.add_guild(players)
+        channel = guild.channels[0]
+        members = guild.members
+        results = [(random.choice(members).id, random.choice(members).id) for _ in range(players * 5)]
+        await self.bot.stats_store.record_results([(w, l) for w, l in results if w != l], guild.id)
+
+        async def one_request(index):
+            user = random.choice(members)
+            if index % 2:
+                await self.invoke('leaderboard', user, channel)
+            else:
+                await self.invoke('stats', user, channel)
+
+        await asyncio.gather(*(one_request(i) for i in range(requests)))
+
+    async def settings_churn(self, toggles: int, commands_per_toggle: int):
+        """Flips a guild's game channel and fires gated commands from inside and outside it."""
+        guild = self.bot.add_guild(50, channels=2)
+        admin = guild.members[0]
+        allowed, other = guild.channels
+        for index in range(toggles):
+            await self.invoke('set_game_channel', admin, allowed, channel=allowed if index % 2 else None)
+            await asyncio.gather(*(
+                self.invoke('stats', random.choice(guild.members), random.choice((allowed, other)))
+                for _ in range(commands_per_toggle)
+            ))
+
+    # --- Reporting ---
+
+    def report(self, wall_seconds: float, virtual_seconds: float, loop_lag) -> dict:
+        commands = {
+            name: {
+                'count': len(samples),
+                'p50_ms': percentile(samples, 0.50) * 1000,
+                'p99_ms': percentile(samples, 0.99) * 1000,
+                'max_ms': max(samples) * 1000,
+            }
+            for name, samples in sorted(self.latencies.items())
+        }
+        writes = list(self.bot.stats_store.write_timings)
+        lag = list(loop_lag)
+        channels = [c for g in self.bot.fake_guilds for c in g.channels]
+        return {
+            'wall_seconds': wall_seconds,
+            'virtual_seconds': virtual_seconds,
+            'commands': self.commands,
+            'throughput_per_s': self.commands / wall_seconds if wall_seconds else 0.0,
+            'errors': dict(self.errors),
+            'latency': commands,
+            'loop_lag_ms': {
+                'p50': percentile(lag, 0.50) * 1000,
+                'p99': percentile(lag, 0.99) * 1000,
+                'max': max(lag, default=0.0) * 1000,
+            },
+            'stats_writes': {
+                'count': len(writes),
+                'mean_ms': (sum(writes) / len(writes) * 1000) if writes else 0.0,
+                'p99_ms': percentile(writes, 0.99) * 1000,
+            },
+            'messages': {
+                'sent': sum(c.sent for c in channels),
+                'edits': sum(c.edits for c in channels),
+                'outbox': self.bot.outbox.stats(),
+            },
+            'member_queries': sum(g.member_queries for g in self.bot.fake_guilds),
+        }
+
+
+async def run_scenario(data_dir: str, scenario: str, options) -> tuple[LoadHarness, float, float]:
+    """Builds a fresh SimBot, runs one scenario, and returns (harness, wall seconds, virtual seconds)."""
+    loop = asyncio.get_running_loop()
+    bot = SimBot(data_dir)
+    async with bot:
+        await bot.setup_hook()
+        harness = LoadHarness(bot)
+        wall_started, virtual_started = time.perf_counter(), loop.time()
+        if scenario == 'duels':
+            await harness.duel_storm(options.duels, options.guilds, options.players)
+        elif scenario == 'queue':
+            await harness.queue_storm(options.duels, options.guilds, options.players)
+        elif scenario == 'tournament':
+            await harness.tournament(options.tournament_players, options.simultaneous, options.simulate)
+        elif scenario == 'leaderboard':
+            await harness.leaderboard_storm(options.requests, options.players)
+        elif scenario == 'settings':
+            await harness.settings_churn(options.toggles, options.requests // max(1, options.toggles))
+        else:
+            raise ValueError(f"Unknown scenario {scenario!r}")
+        # Let queued messages drain so outbox numbers are complete
+        while bot.outbox.depth or bot.outbox.stats()['in_flight']:
+            await asyncio.sleep(0.5)
+        return harness, time.perf_counter() - wall_started, loop.time() - virtual_started
@@ -0,0 +1,136 @@
+# loadsim/memory.py
+"""Compares member cache memory with and without config.LEAN_MEMBER_CACHE.
+
+Feeds synthetic GUILD_CREATE and member chunk payloads through discord.py's
+real ConnectionState, configured the way QuickDrawBot configures it in each
+mode, then replays interactions from the players who are active. Memory is
+what tracemalloc sees still allocated once the guilds are loaded.
+
+    python -m loadsim.memory --guilds 10 --members 20000 --active 500
+"""
+import argparse
+import asyncio
+import gc
+import json
+import random
+import sys
+import tracemalloc
+
+import discord
+from discord.state import ChunkRequest
+
+import config
+from loadsim.fakes import next_id
+from utils.members import MemberResolver
+
+CHUNK_SIZE = 1000  # Members per GUILD_MEMBERS_CHUNK, as Discord sends them
+MODES = ('default', 'lean')
+
+
+def user_payload(user_id, name):
+    return {'id': str(user_id), 'username': name, 'global_name': name.title(), 'discriminator': '0',
+            'avatar': f'{user_id:032x}'[-32:]}
+
+
+def member_payload(user_id, role_ids):
+    return {
+        'user': user_payload(user_id, f'gunslinger{user_id % 100000}'),
+        'roles': [str(role_id) for role_id in random.sample(role_ids, random.randint(0, 3))],
+        'joined_at': '2024-01-01T00:00:00+00:00', 'nick': None, 'deaf': False, 'mute': False, 'flags': 0,
+    }
+
+
+def client_options(mode):
+    """The member options QuickDrawBot passes to discord.py in this mode."""
+    if mode == 'lean':
+        return {'member_cache_flags': discord.MemberCacheFlags.none(), 'chunk_guilds_at_startup': False}
+    return {}
+
+
+async def load_guilds(mode, guilds, members, active):
+    """Builds a client state holding `guilds` guilds as they look after startup and some play."""
+    intents = discord.Intents.default()
+    intents.members = True
+    client = discord.Client(intents=intents, **client_options(mode))
+    state = client._connection
+    bot_id = next_id()
+    state.user = discord.ClientUser(state=state, data=user_payload(bot_id, 'quickdraw'))
+    resolver = MemberResolver(ttl=config.MEMBER_CACHE_TTL, max_size=config.MEMBER_CACHE_SIZE)
+    loop = asyncio.get_running_loop()
+
+    for _ in range(guilds):
+        guild_id = next_id()
+        role_ids = [next_id() for _ in range(20)]
+        guild = state._add_guild_from_data({
+            'id': str(guild_id), 'name': 'Dusty Gulch', 'member_count': members + 1, 'large': True,
+            'roles': [{'id': str(guild_id), 'name': '@everyone', 'permissions': '0', 'position': 0}] + [
+                {'id': str(role_id), 'name': f'role-{role_id}', 'permissions': '0', 'position': 1}
+                for role_id in role_ids
+            ],
+            # Large guilds only list the bot itself; the rest arrives in chunks if requested
+            'members': [member_payload(bot_id, role_ids)],
+        })
+        user_ids = [next_id() for _ in range(members)]
+        if state._guild_needs_chunking(guild):
+            request = state._chunk_requests[guild.id] = ChunkRequest(
+                guild.id, loop, state._get_guild, cache=state.member_cache_flags.joined
+            )
+            chunk_count = -(-members // CHUNK_SIZE)
+            for index in range(chunk_count):
+                state.parse_guild_members_chunk({
+                    'guild_id': str(guild.id), 'nonce': request.nonce,
+                    'chunk_index': index, 'chunk_count': chunk_count,
+                    'members': [member_payload(user_id, role_ids)
+                                for user_id in user_ids[index * CHUNK_SIZE:(index + 1) * CHUNK_SIZE]],
+                })
+        # Each active player sends commands, and every interaction carries its author as a Member
+        for user_id in random.sample(user_ids, min(active, members)):
+            resolver.remember(discord.Member(data=member_payload(user_id, role_ids), guild=guild, state=state))
+    return client, resolver
+
+
+async def measure(mode, guilds, members, active) -> dict:
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    client, resolver = await load_guilds(mode, guilds, members, active)
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    cached = sum(len(guild._members) for guild in client.guilds)
+    report = {
+        'retained_mb': retained / 2 ** 20,
+        'gateway_members': cached,
+        'resolver_members': len(resolver._cache),
+        'users': len(client._connection._users),
+    }
+    del client, resolver
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m loadsim.memory',
+                                     description='Member cache memory with and without LEAN_MEMBER_CACHE.')
+    parser.add_argument('--guilds', type=int, default=10, help='Guilds the bot is in')
+    parser.add_argument('--members', type=int, default=20000, help='Members per guild')
+    parser.add_argument('--active', type=int, default=500, help='Players per guild who use commands')
+    parser.add_argument('--json', metavar='PATH', help='Write the results as JSON')
+    options = parser.parse_args(argv)
+
+    results = {}
+    for mode in MODES:
+        results[mode] = asyncio.run(measure(mode, options.guilds, options.members, options.active))
+        report = results[mode]
+        print(f"{mode:<8} {report['retained_mb']:8.1f} MB retained, {report['gateway_members']} gateway members, "
+              f"{report['resolver_members']} remembered, {report['users']} users")
+    saved = results['default']['retained_mb'] - results['lean']['retained_mb']
+    print(f"Lean mode saves {saved:.1f} MB for {options.guilds} guilds of {options.members} members")
+
+    if options.json:
+        with open(options.json, 'w') as f:
+            json.dump(results, f, indent=4)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,98 @@
+"""Exports and imports QuickDraw Showdown stats in bulk.
+
+Usage:
+    python stats_transfer.py export players > players.csv
+    python stats_transfer.py export duels --format ndjson -o duels.ndjson
+    python stats_transfer.py import snapshot snapshot.csv --db data/new-stats.db
+    python stats_transfer.py import duels duels.ndjson --format ndjson --db data/new-stats.db
+
+Export only reads an existing database and leaves the legacy stats.json
+for the bot to migrate. Import does not migrate stats.json either; a
+database created by an import never picks it up.
+
+Exports stream a page at a time, so memory stays flat however large the
+database is. To move every stat to another deployment exactly, export
+`snapshot` and `duels`, then import them in that order into an empty
+database. Import while the bot is stopped: a running bot only picks up
+rows written by other processes when it runs with shard sync enabled.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+
+import config
+from utils.stats_export import FORMATS, parse_rows, stream_export
+from utils.stats_store import EXPORT_COLUMNS, IMPORT_KINDS, StatsStore
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s:%(levelname)s:%(name)s: %(message)s')
+logger = logging.getLogger('stats_transfer')
+
+
+def guess_format(path, fmt):
+    if fmt:
+        return fmt
+    return 'ndjson' if path and os.path.splitext(path)[1] in ('.ndjson', '.jsonl') else 'csv'
+
+
+async def export(options):
+    # Opening a missing database would create it and mark stats.json as migrated before the bot ever ran
+    if not os.path.exists(options.db):
+        raise ValueError(f"No stats database at {options.db}; start the bot once to create it")
+    store = StatsStore(path=options.db, retention=None)
+    await store.open()
+    out = open(options.output, 'w', encoding='utf-8', newline='') if options.output else sys.stdout
+    try:
+        async for chunk in stream_export(store, options.kind, guess_format(options.output, options.format),
+                                         options.batch_size):
+            out.write(chunk)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        await store.close()
+
+
+async def import_(options):
+    # The legacy stats.json would land in a fresh target database and block a snapshot import
+    store = StatsStore(path=options.db, legacy_file=None, retention=None)
+    await store.open()
+    try:
+        with open(options.input, 'r', encoding='utf-8', newline='') as f:
+            rows = parse_rows(options.kind, guess_format(options.input, options.format), f)
+            imported = await store.import_rows(options.kind, rows, options.batch_size)
+        logger.info(f"Imported {imported} {options.kind} rows from {options.input}")
+    finally:
+        await store.close()
+
+
+def main(argv=None):
+    # --db and --batch-size go after the subcommand, so they are shared through a parent parser
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--db', default=config.STATS_DB_FILE, help=f'Stats database (default {config.STATS_DB_FILE})')
+    common.add_argument('--batch-size', type=int, default=5000, help='Rows per page or transaction')
+
+    parser = argparse.ArgumentParser(description='Bulk export and import of QuickDraw stats.')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    export_parser = commands.add_parser('export', parents=[common], help='Stream a table as CSV or NDJSON')
+    export_parser.add_argument('kind', choices=sorted(EXPORT_COLUMNS))
+    export_parser.add_argument('-o', '--output', help='File to write (default stdout)')
+    export_parser.add_argument('--format', choices=FORMATS, help='Default: from the file extension, else csv')
+
+    import_parser = commands.add_parser('import', parents=[common], help='Load an export in batched transactions')
+    import_parser.add_argument('kind', choices=IMPORT_KINDS)
+    import_parser.add_argument('input', help='CSV or NDJSON file written by export')
+    import_parser.add_argument('--format', choices=FORMATS, help='Default: from the file extension, else csv')
+
+    options = parser.parse_args(argv)
+    try:
+        asyncio.run(export(options) if options.command == 'export' else import_(options))
+    except ValueError as e:
+        logger.error(str(e))
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
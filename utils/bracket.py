@@ -0,0 +1,147 @@
+# utils/bracket.py
+import struct
+import sys
+from array import array
+
+# Slot value for an empty leaf (a bye) or a match that has not been decided yet
+EMPTY = -1
+
+_HEADER = struct.Struct('<4sBxHI')  # magic, format version, padding, rounds, player count
+_MAGIC = b'QDBR'
+_VERSION = 1
+
+
+def seed_order(size: int) -> list[int]:
+    """Standard bracket order of 1-based seeds for a power-of-two field.
+
+    Seed 1 meets seed `size` in round 1, and the top two seeds can only meet
+    in the final. For size 8 this is [1, 8, 4, 5, 2, 7, 3, 6].
+    """
+    order = [1]
+    while len(order) < size:
+        total = len(order) * 2 + 1
+        order = [seed for top in order for seed in (top, total - top)]
+    return order
+
+
+class Bracket:
+    """A single-elimination bracket stored as a flat binary tree.
+
+    `players` holds user IDs in seed order (seed 1 first). `slots` is a
+    heap-ordered tree of 2 * size entries, where size is the field rounded up
+    to a power of two: the leaves at [size, 2 * size) hold the seed index
+    placed there, and internal node i holds the seed index of the winner of
+    the match between nodes 2i and 2i+1, or EMPTY while undecided.
+
+    Because the field is more than half the bracket size and seeds are
+    placed in standard order, every bye faces a real player, so byes only
+    ever occur in round 1 and are resolved when the bracket is built. Both
+    arrays are fixed-width, so a 4,096-player bracket takes about 64 KB and
+    serializes to a single bytes blob.
+    """
+
+    def __init__(self, players: array, slots: array, rounds: int):
+        self.players = players
+        self.slots = slots
+        self.rounds = rounds
+        self.size = 1 << rounds
+
+    @classmethod
+    def seeded(cls, user_ids) -> 'Bracket':
+        """Builds a bracket from user IDs in seed order. Needs at least two players."""
+        players = array('q', user_ids)
+        if len(players) < 2:
+            raise ValueError("A bracket needs at least two players")
+        rounds = (len(players) - 1).bit_length()
+        size = 1 << rounds
+        slots = array('i', [EMPTY]) * (2 * size)
+        for leaf, seed in enumerate(seed_order(size)):
+            if seed <= len(players):
+                slots[size + leaf] = seed - 1
+        bracket = cls(players, slots, rounds)
+        # Walkovers: a player facing an empty leaf advances straight away
+        for node in range(size // 2, size):
+            left, right = slots[2 * node], slots[2 * node + 1]
+            if left == EMPTY or right == EMPTY:
+                slots[node] = right if left == EMPTY else left
+        return bracket
+
+    def __len__(self):
+        return len(self.players)
+
+    # --- Navigation ---
+
+    def _round_nodes(self, round_num: int) -> range:
+        """Tree nodes holding the matches of a 1-based round."""
+        return range(self.size >> round_num, self.size >> (round_num - 1))
+
+    def _player(self, node: int) -> int | None:
+        seed = self.slots[node]
+        return None if seed == EMPTY else self.players[seed]
+
+    def matches(self, round_num: int) -> list[tuple[int, int, int]]:
+        """Undecided matches of a round whose players are both known, as (match_num, p1, p2)."""
+        first = self.size >> round_num
+        return [
+            (node - first + 1, self.players[self.slots[2 * node]], self.players[self.slots[2 * node + 1]])
+            for node in self._round_nodes(round_num)
+            if self.slots[node] == EMPTY and self.slots[2 * node] != EMPTY and self.slots[2 * node + 1] != EMPTY
+        ]
+
+    @property
+    def current_round(self) -> int | None:
+        """The earliest round that still has an undecided match, or None once finished."""
+        for round_num in range(1, self.rounds + 1):
+            if any(self.slots[node] == EMPTY for node in self._round_nodes(round_num)):
+                return round_num
+        return None
+
+    @property
+    def champion(self) -> int | None:
+        return self._player(1)
+
+    def record(self, round_num: int, match_num: int, winner_id: int):
+        """Records the winner of a match; winner_id must be one of its two players."""
+        node = (self.size >> round_num) + match_num - 1
+        if node not in self._round_nodes(round_num):
+            raise ValueError(f"Round {round_num} has no match {match_num}")
+        for child in (2 * node, 2 * node + 1):
+            if self._player(child) == winner_id:
+                self.slots[node] = self.slots[child]
+                return
+        raise ValueError(f"{winner_id} is not playing match {match_num} of round {round_num}")
+
+    def results(self, round_num: int) -> list[tuple[int, int | None, int | None, int | None]]:
+        """Every match of a round as (match_num, p1, p2, winner), with None for byes and unknowns."""
+        first = self.size >> round_num
+        return [
+            (node - first + 1, self._player(2 * node), self._player(2 * node + 1), self._player(node))
+            for node in self._round_nodes(round_num)
+        ]
+
+    # --- Serialization ---
+
+    def to_bytes(self) -> bytes:
+        players, slots = self.players, self.slots
+        if sys.byteorder != 'little':
+            players, slots = array('q', players), array('i', slots)
+            players.byteswap()
+            slots.byteswap()
+        return _HEADER.pack(_MAGIC, _VERSION, self.rounds, len(players)) + players.tobytes() + slots.tobytes()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'Bracket':
+        magic, version, rounds, count = _HEADER.unpack_from(data)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError("Not a serialized bracket")
+        players, slots = array('q'), array('i')
+        offset = _HEADER.size
+        players.frombytes(data[offset:offset + count * players.itemsize])
+        offset += count * players.itemsize
+        slots.frombytes(data[offset:offset + (2 << rounds) * slots.itemsize])
+        if sys.byteorder != 'little':
+            players.byteswap()
+            slots.byteswap()
+        if len(players) != count or len(slots) != 2 << rounds:
+            raise ValueError("Truncated bracket data")
+        return cls(players, slots, rounds)
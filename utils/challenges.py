@@ -0,0 +1,108 @@
+# utils/challenges.py
+import asyncio
+import logging
+import math
+
+from utils import clock
+
+logger = logging.getLogger(__name__)
+
+
+class Challenge:
+    """A pending duel challenge waiting for the target to /accept."""
+
+    __slots__ = ('challenger_id', 'target_id', 'channel_id', 'created_at', 'expires_at')
+
+    def __init__(self, challenger_id: int, target_id: int, channel_id: int, created_at: float, expires_at: float):
+        self.challenger_id = challenger_id
+        self.target_id = target_id
+        self.channel_id = channel_id
+        self.created_at = created_at
+        self.expires_at = expires_at
+
+
+class ChallengeRegistry:
+    """Pending challenges indexed by challenger, by target and by (target, channel).
+
+    Every lookup the duel commands need is a dict access. Stale challenges are
+    expired by one hashed timer wheel swept by a single background task,
+    rather than a sleeping task per challenge.
+    """
+
+    def __init__(self, timeout: float, tick: float = 1.0, slots: int = 64, on_expire=None):
+        self.timeout = timeout
+        self.tick = tick
+        self.on_expire = on_expire  # Optional coroutine function called with each expired Challenge
+        self._by_challenger = {}  # Format: {challenger_id: Challenge}
+        self._by_target = {}  # Format: {target_id: Challenge}
+        self._by_target_channel = {}  # Format: {(target_id, channel_id): Challenge}
+        self._wheel = [set() for _ in range(slots)]
+        self._sweeper = None
+        self.expired = 0
+
+    def __len__(self):
+        return len(self._by_challenger)
+
+    def _tick_of(self, timestamp):
+        return math.ceil(timestamp / self.tick)
+
+    def add(self, challenger_id: int, target_id: int, channel_id: int) -> Challenge:
+        """Registers a new challenge. Callers check for conflicts first."""
+        now = clock.monotonic()
+        challenge = Challenge(challenger_id, target_id, channel_id, now, now + self.timeout)
+        self._by_challenger[challenger_id] = challenge
+        self._by_target[target_id] = challenge
+        self._by_target_channel[(target_id, channel_id)] = challenge
+        self._wheel[self._tick_of(challenge.expires_at) % len(self._wheel)].add(challenge)
+        if self._sweeper is None or self._sweeper.done():
+            self._sweeper = asyncio.get_running_loop().create_task(self._sweep_loop())
+        return challenge
+
+    def by_challenger(self, challenger_id: int) -> Challenge | None:
+        return self._by_challenger.get(challenger_id)
+
+    def by_target(self, target_id: int) -> Challenge | None:
+        return self._by_target.get(target_id)
+
+    def find(self, target_id: int, channel_id: int) -> Challenge | None:
+        """Returns the challenge aimed at target_id in channel_id, if any."""
+        return self._by_target_channel.get((target_id, channel_id))
+
+    def remove(self, challenge: Challenge):
+        """Removes a challenge from every index and the timer wheel."""
+        if self._by_challenger.get(challenge.challenger_id) is challenge:
+            del self._by_challenger[challenge.challenger_id]
+        if self._by_target.get(challenge.target_id) is challenge:
+            del self._by_target[challenge.target_id]
+        key = (challenge.target_id, challenge.channel_id)
+        if self._by_target_channel.get(key) is challenge:
+            del self._by_target_channel[key]
+        self._wheel[self._tick_of(challenge.expires_at) % len(self._wheel)].discard(challenge)
+
+    async def _sweep_loop(self):
+        current_tick = self._tick_of(clock.monotonic())
+        while self._by_challenger:
+            await asyncio.sleep(max(0.0, current_tick * self.tick - clock.monotonic()))
+            now = clock.monotonic()
+            # Catch up on every slot we passed if the loop was delayed; past one
+            # full rotation every slot is visited anyway, so skip the extra laps
+            last_tick = math.floor(now / self.tick)
+            current_tick = max(current_tick, last_tick - len(self._wheel) + 1)
+            while current_tick * self.tick <= now:
+                slot = self._wheel[current_tick % len(self._wheel)]
+                due = [c for c in slot if c.expires_at <= now]
+                for challenge in due:
+                    self.remove(challenge)
+                    self.expired += 1
+                    if self.on_expire is not None:
+                        try:
+                            await self.on_expire(challenge)
+                        except Exception as e:
+                            logger.error(f"Challenge expiry callback failed: {e}", exc_info=True)
+                current_tick += 1
+
+    def close(self):
+        """Stops the sweeper task."""
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            self._sweeper = None
@@ -0,0 +1,20 @@
+# utils/checks.py
+from discord import app_commands
+
+
+class NotInGameChannel(app_commands.CheckFailure):
+    """Raised when a game command is used outside the guild's configured game channel."""
+
+    def __init__(self, channel_id: int):
+        self.channel_id = channel_id
+        super().__init__(f"This command can only be used in <#{channel_id}>!")
+
+
+def game_channel_only():
+    """App command check that restricts a command to the guild's game channel, if one is set."""
+    async def predicate(interaction):
+        allowed_channel_id = interaction.client.guild_settings.get_game_channel(interaction.guild_id)
+        if allowed_channel_id is not None and interaction.channel_id != allowed_channel_id:
+            raise NotInGameChannel(allowed_channel_id)
+        return True
+    return app_commands.check(predicate)
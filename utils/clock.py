@@ -0,0 +1,15 @@
+# utils/clock.py
+import asyncio
+import time
+
+
+def monotonic() -> float:
+    """Current time on the running event loop's clock, or time.monotonic() outside a loop.
+
+    Timeouts measured with this stay consistent with asyncio.sleep, including
+    when the load simulator runs the loop on a virtual clock.
+    """
+    try:
+        return asyncio.get_running_loop().time()
+    except RuntimeError:
+        return time.monotonic()
@@ -0,0 +1,35 @@
+# utils/guild_settings.py
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class GuildSettingsCache:
+    """In-memory copy of per-guild settings, loaded once at startup.
+
+    Reads are plain dict lookups so command checks never touch the database.
+    Writes go to settings.db first and only update the cache on success.
+    """
+
+    def __init__(self, db):
+        self.db = db  # SettingsDatabase
+        self._game_channels = {}  # Format: {guild_id: channel_id}
+
+    async def load(self):
+        """Loads every guild's settings from the database."""
+        self._game_channels = await self.db.all_game_channels()
+        logger.info(f"Loaded settings for {len(self._game_channels)} guilds")
+
+    def get_game_channel(self, guild_id: int) -> int | None:
+        """Returns the configured game channel ID for a guild, or None if unrestricted."""
+        return self._game_channels.get(guild_id)
+
+    async def set_game_channel(self, guild_id: int, channel_id: int | None) -> bool:
+        """Persists a guild's game channel and updates the cache if the write succeeded."""
+        success = await self.db.set_game_channel(guild_id, channel_id)
+        if success:
+            if channel_id is None:
+                self._game_channels.pop(guild_id, None)
+            else:
+                self._game_channels[guild_id] = channel_id
+        return success
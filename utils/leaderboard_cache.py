@@ -0,0 +1,158 @@
+# utils/leaderboard_cache.py
+import asyncio
+import logging
+from collections import OrderedDict
+
+import config
+from utils import clock
+
+logger = logging.getLogger(__name__)
+
+
+class _Entry:
+    __slots__ = ('payload', 'ranking', 'top', 'built_at', 'stale')
+
+    def __init__(self, payload, ranking, top):
+        self.payload = payload
+        self.ranking = ranking  # The RankingIndex the payload was rendered from
+        self.top = top  # ranking.top(size) at render time
+        self.built_at = clock.monotonic()
+        self.stale = False
+
+
+class LeaderboardCache:
+    """Rendered leaderboards, rebuilt only when the players on them change.
+
+    Each entry remembers the top-K rows it was rendered from. After every
+    committed write the cache compares those rows with the live ranking
+    index and marks the entry stale only if they differ, so results below
+    the top K never cost a rebuild. Entries also go stale after `ttl`
+    seconds, so renamed members eventually show up.
+
+    Stale entries are served as-is while one background rebuild per key
+    refreshes them (stale-while-revalidate); callers with nothing cached
+    yet all await that same rebuild.
+    """
+
+    def __init__(self, store, size: int = 10, ttl: float = config.LEADERBOARD_CACHE_TTL,
+                 max_entries: int = 1000):
+        self.store = store
+        self.size = size
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.rebuilds = 0
+        self._entries = OrderedDict()  # Format: {key: _Entry}
+        self._by_ranking = {}  # Format: {id(RankingIndex): {key, ...}} of the entries rendered from it
+        self._rebuilding = {}  # Format: {key: Future} resolved with the payload being rendered
+        self._revalidating = {}  # Format: {key: Task} refreshing a stale entry in the background
+        self._generation = store.generation
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _check_generation(self):
+        # A rebuild replaces the ranking indexes the entries point at
+        if self.store.generation != self._generation:
+            self._generation = self.store.generation
+            self._entries.clear()
+            self._by_ranking.clear()
+
+    def _unindex(self, key, entry):
+        keys = self._by_ranking.get(id(entry.ranking))
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_ranking[id(entry.ranking)]
+
+    def _store(self, key, entry):
+        old = self._entries.get(key)
+        if old is not None:
+            self._unindex(key, old)
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        self._by_ranking.setdefault(id(entry.ranking), set()).add(key)
+        while len(self._entries) > self.max_entries:
+            evicted_key, evicted = self._entries.popitem(last=False)
+            self._unindex(evicted_key, evicted)
+
+    def on_write(self, rows, guild_rows):
+        """StatsStore listener: marks entries whose top K just changed as stale.
+
+        Only entries rendered from a ranking the write touched are checked:
+        the global ranking and those of the guilds in guild_rows.
+        """
+        self._check_generation()
+        rankings = [self.store.ranking] if rows else []
+        rankings.extend(self.store.loaded_guild_ranking(guild_id) for guild_id in guild_rows)
+        for ranking in rankings:
+            keys = self._by_ranking.get(id(ranking)) if ranking is not None else None
+            if not keys:
+                continue
+            top = ranking.top(self.size)
+            for key in keys:
+                entry = self._entries[key]
+                if not entry.stale and top != entry.top:
+                    entry.stale = True
+
+    async def _rebuild(self, key, ranking, render):
+        """Renders key's payload, publishing it to anyone waiting on the same key."""
+        future = self._rebuilding[key] = asyncio.get_running_loop().create_future()
+        try:
+            top = ranking.top(self.size)
+            payload = await render(top)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # Waiters see it; nobody waiting is not an error
+            raise
+        finally:
+            del self._rebuilding[key]
+        self.rebuilds += 1
+        # Results recorded while rendering leave it stale, so the next request rebuilds again
+        entry = _Entry(payload, ranking, top)
+        entry.stale = ranking.top(self.size) != top
+        self._store(key, entry)
+        future.set_result(payload)
+        return payload
+
+    async def _revalidate(self, key, ranking, render):
+        try:
+            await self._rebuild(key, ranking, render)
+        except Exception as e:
+            logger.error(f"Leaderboard rebuild for {key} failed: {e}", exc_info=True)
+        finally:
+            self._revalidating.pop(key, None)
+
+    def _start_revalidate(self, key, ranking, render):
+        if key in self._rebuilding or key in self._revalidating:
+            return
+        self._revalidating[key] = asyncio.get_running_loop().create_task(self._revalidate(key, ranking, render))
+
+    async def get(self, key, ranking, render):
+        """Returns the cached payload for key, rendering it from ranking if needed.
+
+        render is a coroutine function taking the top-K rows and returning
+        the payload (None is a valid payload, e.g. for an empty board).
+        """
+        self._check_generation()
+        entry = self._entries.get(key)
+        if entry is not None and entry.ranking is ranking:
+            self._entries.move_to_end(key)
+            if entry.stale or clock.monotonic() - entry.built_at > self.ttl:
+                self._start_revalidate(key, ranking, render)
+            self.hits += 1
+            return entry.payload
+        self.misses += 1
+        future = self._rebuilding.get(key)
+        if future is not None:
+            # Shield the shared rebuild so one cancelled caller cannot cancel it for the rest
+            return await asyncio.shield(future)
+        return await self._rebuild(key, ranking, render)
+
+    def stats(self) -> dict[str, int]:
+        """Counters for metrics and debugging."""
+        return {'hits': self.hits, 'misses': self.misses, 'rebuilds': self.rebuilds, 'size': len(self._entries)}
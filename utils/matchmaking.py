@@ -0,0 +1,157 @@
+# utils/matchmaking.py
+import asyncio
+import bisect
+import logging
+
+from utils import clock
+
+logger = logging.getLogger(__name__)
+
+
+class QueueEntry:
+    """A player waiting in /queue for an opponent."""
+
+    __slots__ = ('user_id', 'channel_id', 'rating', 'joined_at', 'member')
+
+    def __init__(self, user_id: int, channel_id: int, rating: float, joined_at: float, member=None):
+        self.user_id = user_id
+        self.channel_id = channel_id
+        self.rating = rating
+        self.joined_at = joined_at
+        self.member = member  # The discord.Member who queued, kept so the duel can mention them
+
+    @property
+    def key(self):
+        return (self.rating, self.joined_at, self.user_id)
+
+
+class MatchmakingQueue:
+    """Players waiting for a duel, kept sorted by rating in one pool per channel.
+
+    A player who joins is paired at once with the closest-rated waiting
+    player in the same channel if the gap fits either player's acceptable
+    range. Finding that neighbour is a binary search, O(log n). The range
+    starts at `base_range` rating points and widens by `widen_rate` points
+    per second waited, up to `max_range`. A background sweep every `tick`
+    seconds pairs neighbours whose ranges have grown wide enough, and drops
+    anyone who waited longer than `timeout`.
+    """
+
+    def __init__(self, base_range: float, widen_rate: float, max_range: float, timeout: float,
+                 tick: float = 2.0, on_match=None, on_expire=None):
+        self.base_range = base_range
+        self.widen_rate = widen_rate
+        self.max_range = max_range
+        self.timeout = timeout
+        self.tick = tick
+        self.on_match = on_match  # Optional coroutine function called with (entry, opponent) for sweep matches
+        self.on_expire = on_expire  # Optional coroutine function called with each expired QueueEntry
+        self._entries = {}  # Format: {user_id: QueueEntry}
+        self._pools = {}  # Format: {channel_id: [QueueEntry.key, ...] sorted by rating}
+        self._sweeper = None
+        self.matched = 0
+        self.expired = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, user_id):
+        return user_id in self._entries
+
+    def get(self, user_id: int) -> QueueEntry | None:
+        return self._entries.get(user_id)
+
+    def window(self, entry: QueueEntry, now: float) -> float:
+        """Rating gap this player currently accepts."""
+        return min(self.max_range, self.base_range + self.widen_rate * (now - entry.joined_at))
+
+    def _compatible(self, a, b, now):
+        return abs(a.rating - b.rating) <= max(self.window(a, now), self.window(b, now))
+
+    def _discard(self, entry):
+        del self._entries[entry.user_id]
+        pool = self._pools[entry.channel_id]
+        index = bisect.bisect_left(pool, entry.key)
+        del pool[index]
+        if not pool:
+            del self._pools[entry.channel_id]
+
+    def add(self, user_id: int, channel_id: int, rating: float, member=None) -> QueueEntry | None:
+        """Queues a player, or pairs them straight away.
+
+        Returns the opponent's entry (already removed from the queue) if a
+        match was found, otherwise None. Callers check the player is not
+        queued already.
+        """
+        now = clock.monotonic()
+        entry = QueueEntry(user_id, channel_id, rating, now, member)
+        pool = self._pools.get(channel_id, [])
+        index = bisect.bisect_left(pool, entry.key)
+        # Only the nearest waiting player on each side can be the closest match
+        candidates = [self._entries[key[2]] for key in pool[max(0, index - 1):index + 1]]
+        candidates = [c for c in candidates if self._compatible(entry, c, now)]
+        if candidates:
+            opponent = min(candidates, key=lambda c: (abs(c.rating - rating), c.joined_at))
+            self._discard(opponent)
+            self.matched += 1
+            return opponent
+        pool.insert(index, entry.key)
+        self._pools[channel_id] = pool
+        self._entries[user_id] = entry
+        if self._sweeper is None or self._sweeper.done():
+            self._sweeper = asyncio.get_running_loop().create_task(self._sweep_loop())
+        return None
+
+    def remove(self, user_id: int) -> QueueEntry | None:
+        """Takes a player out of the queue. Returns their entry, or None if they were not queued."""
+        entry = self._entries.get(user_id)
+        if entry is not None:
+            self._discard(entry)
+        return entry
+
+    def _pair_waiting(self, now):
+        """Greedily pairs rating neighbours whose ranges now overlap."""
+        matches = []
+        for channel_id in list(self._pools):
+            pool = [self._entries[key[2]] for key in self._pools[channel_id]]
+            index = 0
+            while index < len(pool) - 1:
+                a, b = pool[index], pool[index + 1]
+                if self._compatible(a, b, now):
+                    matches.append((a, b))
+                    index += 2
+                else:
+                    index += 1
+        for a, b in matches:
+            self._discard(a)
+            self._discard(b)
+        self.matched += len(matches)
+        return matches
+
+    async def _sweep_loop(self):
+        while self._entries:
+            await asyncio.sleep(self.tick)
+            now = clock.monotonic()
+            expired = [entry for entry in self._entries.values() if now - entry.joined_at >= self.timeout]
+            for entry in expired:
+                self._discard(entry)
+            self.expired += len(expired)
+            matches = self._pair_waiting(now)
+            for entry in expired:
+                if self.on_expire is not None:
+                    try:
+                        await self.on_expire(entry)
+                    except Exception as e:
+                        logger.error(f"Queue expiry callback failed: {e}", exc_info=True)
+            for entry, opponent in matches:
+                if self.on_match is not None:
+                    try:
+                        await self.on_match(entry, opponent)
+                    except Exception as e:
+                        logger.error(f"Queue match callback failed: {e}", exc_info=True)
+
+    def close(self):
+        """Stops the sweeper task."""
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            self._sweeper = None
@@ -0,0 +1,125 @@
+# utils/members.py
+import asyncio
+import logging
+from collections import OrderedDict
+
+import discord
+
+from utils import clock
+
+logger = logging.getLogger(__name__)
+
+QUERY_BATCH_SIZE = 100  # Discord's limit for user_ids in one member request
+
+
+class MemberResolver:
+    """Resolves guild members and display names with at most one bulk query.
+
+    Lookups try the gateway member cache first, then a bounded TTL cache of
+    earlier results. Whatever is still missing is fetched in one batched
+    gateway member query, and anything that cannot be resolved falls back
+    to a placeholder name instead of failing the command.
+
+    When the gateway cache is turned off (config.LEAN_MEMBER_CACHE), the
+    TTL cache is the only member cache: remember() feeds it the members
+    that interactions deliver, so the players in a duel or tournament are
+    usually resolved without a query.
+    """
+
+    def __init__(self, ttl: float = 300, max_size: int = 5000, query_timeout: float = 2.0):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.query_timeout = query_timeout
+        self._cache = OrderedDict()  # Format: {(guild_id, user_id): (expires_at, member_or_None)}
+
+    def _get_cached(self, guild_id, user_id):
+        """Returns (hit, member) for a cached entry, evicting it if it expired."""
+        key = (guild_id, user_id)
+        entry = self._cache.get(key)
+        if entry is None:
+            return False, None
+        expires_at, member = entry
+        if expires_at < clock.monotonic():
+            del self._cache[key]
+            return False, None
+        self._cache.move_to_end(key)
+        return True, member
+
+    def _put(self, guild_id, user_id, member):
+        key = (guild_id, user_id)
+        self._cache[key] = (clock.monotonic() + self.ttl, member)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.max_size:
+            self._cache.popitem(last=False)
+
+    def remember(self, member):
+        """Caches a member an interaction delivered, unless the gateway cache already holds them."""
+        if not isinstance(member, discord.Member) or member.guild.get_member(member.id) is not None:
+            return
+        self._put(member.guild.id, member.id, member)
+
+    def cached(self, guild, user_id: int) -> discord.Member | None:
+        """Returns a member from the gateway or TTL cache without querying Discord, or None."""
+        member = guild.get_member(user_id)
+        if member is None:
+            _, member = self._get_cached(guild.id, user_id)
+        return member
+
+    def invalidate(self, guild_id: int, user_id: int):
+        """Drops a cached entry, e.g. after a member update or removal."""
+        self._cache.pop((guild_id, user_id), None)
+
+    async def _query(self, guild, user_ids):
+        """Fetches members in bulk; a failed query resolves nobody rather than raising."""
+        found = {}
+        for start in range(0, len(user_ids), QUERY_BATCH_SIZE):
+            batch = user_ids[start:start + QUERY_BATCH_SIZE]
+            try:
+                members = await asyncio.wait_for(
+                    guild.query_members(user_ids=batch, limit=len(batch), cache=False),
+                    timeout=self.query_timeout
+                )
+            except (asyncio.TimeoutError, discord.ClientException, discord.HTTPException) as e:
+                logger.warning(f"Member query for {len(batch)} users in guild {guild.id} failed: {e}")
+                continue
+            for member in members:
+                found[member.id] = member
+            # Users the query did not return have left the guild; cache that too
+            for user_id in batch:
+                self._put(guild.id, user_id, found.get(user_id))
+        return found
+
+    async def resolve(self, guild, user_ids) -> dict[int, discord.Member | None]:
+        """Returns {user_id: member or None} for every requested user."""
+        resolved = {}
+        misses = []
+        for user_id in dict.fromkeys(user_ids):
+            if user_id is None:
+                continue
+            member = guild.get_member(user_id)
+            if member is not None:
+                resolved[user_id] = member
+                continue
+            hit, member = self._get_cached(guild.id, user_id)
+            if hit:
+                resolved[user_id] = member
+            else:
+                misses.append(user_id)
+
+        if misses:
+            found = await self._query(guild, misses)
+            for user_id in misses:
+                resolved[user_id] = found.get(user_id)
+        return resolved
+
+    async def resolve_one(self, guild, user_id: int) -> discord.Member | None:
+        """Returns a single member, or None if they cannot be found."""
+        return (await self.resolve(guild, [user_id]))[user_id]
+
+    async def display_names(self, guild, user_ids, unknown: str = "Unknown Gunslinger ({user_id})") -> dict[int, str]:
+        """Returns {user_id: display name}, using the `unknown` template for unresolved users."""
+        members = await self.resolve(guild, user_ids)
+        return {
+            user_id: member.display_name if member else unknown.format(user_id=user_id)
+            for user_id, member in members.items()
+        }
@@ -0,0 +1,306 @@
+# utils/outbox.py
+import asyncio
+import enum
+import itertools
+import logging
+from collections import deque
+
+from utils import clock
+
+logger = logging.getLogger(__name__)
+
+MESSAGE_LIMIT = 2000  # Discord's maximum message length
+
+
+class Priority(enum.IntEnum):
+    """Dispatch priority of an outbound message; lower values go first."""
+    RESULT = 0    # The draw, duel outcomes and winners
+    NORMAL = 1    # Announcements and countdown starts
+    COSMETIC = 2  # Countdown ticks that may be dropped if superseded
+
+
+class _TokenBucket:
+    """Simple token bucket mirroring a Discord rate-limit bucket."""
+
+    __slots__ = ('capacity', 'rate', 'tokens', 'updated')
+
+    def __init__(self, capacity: int, per: float):
+        self.capacity = capacity
+        self.rate = capacity / per
+        self.tokens = float(capacity)
+        self.updated = clock.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, now) -> float:
+        """Seconds until a token is available (0 if one is available now)."""
+        self._refill(now)
+        # Refills accumulate rounding error; a token short by less than that is available,
+        # otherwise the wait can be too small to move the clock and the dispatcher spins
+        if self.tokens >= 1 - 1e-9:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def take(self, now):
+        self._refill(now)
+        self.tokens -= 1
+
+
+class _Op:
+    __slots__ = ('kind', 'channel_id', 'target', 'content', 'kwargs', 'priority', 'seq', 'enqueued_at', 'futures', 'coalesce')
+
+    def __init__(self, kind, channel_id, target, content, kwargs, priority, seq, future, coalesce=False):
+        self.kind = kind  # 'send' or 'edit'
+        self.channel_id = channel_id
+        self.target = target  # Channel for sends, message for edits
+        self.content = content
+        self.kwargs = kwargs
+        self.priority = priority
+        self.seq = seq
+        self.enqueued_at = clock.monotonic()
+        self.futures = [future]
+        self.coalesce = coalesce
+
+    @property
+    def sort_key(self):
+        return (self.priority, self.seq)
+
+    @property
+    def coalescable(self):
+        return self.coalesce and self.kind == 'send' and not self.kwargs and self.content is not None
+
+
+def _consume_exception(future):
+    # Callers may fire and forget cosmetic updates; failures are already logged
+    if not future.cancelled():
+        future.exception()
+
+
+class Outbox:
+    """Central, rate-limit-aware queue for channel messages and edits.
+
+    Every send and edit goes through per-channel and global token buckets so
+    the bot paces itself instead of running into 429 backoffs. While an op is
+    waiting, consecutive plain-text sends to the same channel are merged into
+    one message, a newer edit of the same message replaces the pending one,
+    and results are dispatched ahead of cosmetic countdown updates. Only one
+    request per channel is in flight at a time, which keeps channel order.
+    """
+
+    def __init__(self, channel_rate: tuple[int, float] = (5, 5.0), global_rate: tuple[int, float] = (50, 1.0),
+                 max_in_flight: int = 8, wait_samples: int = 1000):
+        self.channel_rate = channel_rate
+        self.max_in_flight = max_in_flight
+        self._global_bucket = _TokenBucket(*global_rate)
+        self._channel_buckets = {}  # Format: {channel_id: _TokenBucket}
+        self._pending = {}  # Format: {channel_id: [_Op, ...]} in enqueue order
+        self._in_flight = set()  # Channel IDs with a request on the wire
+        self._tasks = set()
+        self._seq = itertools.count()
+        self._wakeup = None
+        self._dispatcher = None
+        self._waits = deque(maxlen=wait_samples)
+        self.sent = 0
+        self.coalesced = 0
+        self.superseded = 0
+        self.failed = 0
+
+    # --- Public API ---
+
+    def send(self, channel, content=None, *, priority: Priority = Priority.NORMAL, coalesce: bool = True,
+             **kwargs) -> asyncio.Future:
+        """Queues a message; the returned future resolves to the sent Message.
+
+        Pass coalesce=False for messages that will be edited later, so they
+        are never merged with unrelated text.
+        """
+        future = self._new_future()
+        op = _Op('send', channel.id, channel, content, kwargs, priority, next(self._seq), future, coalesce)
+        self._pending.setdefault(channel.id, []).append(op)
+        self._notify()
+        return future
+
+    def edit(self, message, content=None, *, priority: Priority = Priority.COSMETIC, **kwargs) -> asyncio.Future:
+        """Queues an edit; the future resolves to the Message, or None if a newer edit replaced it."""
+        future = self._new_future()
+        channel_id = message.channel.id
+        queue = self._pending.setdefault(channel_id, [])
+        for op in queue:
+            if op.kind == 'edit' and op.target.id == message.id:
+                # Supersede the pending edit instead of sending both
+                for old_future in op.futures:
+                    if not old_future.done():
+                        old_future.set_result(None)
+                self.superseded += len(op.futures)
+                op.futures = [future]
+                op.content = content
+                op.kwargs = kwargs
+                op.priority = min(op.priority, priority)
+                self._notify()
+                return future
+        queue.append(_Op('edit', channel_id, message, content, kwargs, priority, next(self._seq), future))
+        self._notify()
+        return future
+
+    @property
+    def depth(self) -> int:
+        """Number of queued (not yet dispatched) operations."""
+        return sum(len(queue) for queue in self._pending.values())
+
+    def stats(self) -> dict:
+        """Returns queue depth, counters and wait-time percentiles in seconds."""
+        waits = sorted(self._waits)
+
+        def percentile(p):
+            if not waits:
+                return 0.0
+            return waits[min(len(waits) - 1, int(p * len(waits)))]
+
+        return {
+            'depth': self.depth,
+            'in_flight': len(self._in_flight),
+            'sent': self.sent,
+            'coalesced': self.coalesced,
+            'superseded': self.superseded,
+            'failed': self.failed,
+            'wait_p50': percentile(0.50),
+            'wait_p99': percentile(0.99),
+            'wait_max': waits[-1] if waits else 0.0,
+        }
+
+    async def close(self):
+        """Stops the dispatcher; anything still queued is cancelled."""
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+            self._dispatcher = None
+        for queue in self._pending.values():
+            for op in queue:
+                for future in op.futures:
+                    future.cancel()
+        self._pending.clear()
+
+    # --- Dispatching ---
+
+    def _new_future(self):
+        loop = asyncio.get_running_loop()
+        if self._dispatcher is None or self._dispatcher.done():
+            self._wakeup = asyncio.Event()
+            self._dispatcher = loop.create_task(self._dispatch_loop())
+        future = loop.create_future()
+        future.add_done_callback(_consume_exception)
+        return future
+
+    def _notify(self):
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def _bucket(self, channel_id):
+        bucket = self._channel_buckets.get(channel_id)
+        if bucket is None:
+            bucket = self._channel_buckets[channel_id] = _TokenBucket(*self.channel_rate)
+        return bucket
+
+    def _next_ready(self):
+        """Returns (channel_id, op) for the best dispatchable op, or (None, seconds to wait)."""
+        now = clock.monotonic()
+        global_delay = self._global_bucket.delay(now)
+        best = None
+        min_delay = None
+        for channel_id, queue in self._pending.items():
+            if not queue or channel_id in self._in_flight:
+                continue
+            op = min(queue, key=lambda o: o.sort_key)
+            delay = max(global_delay, self._bucket(channel_id).delay(now))
+            if delay > 0:
+                min_delay = delay if min_delay is None else min(min_delay, delay)
+            elif best is None or op.sort_key < best[1].sort_key:
+                best = (channel_id, op)
+        if best is not None:
+            return best
+        return None, min_delay
+
+    def _take_batch(self, channel_id, op):
+        """Removes op from its queue along with any directly following sends it can absorb."""
+        queue = self._pending[channel_id]
+        index = queue.index(op)
+        batch = [op]
+        if op.coalescable:
+            length = len(op.content)
+            end = index + 1
+            while end < len(queue) and queue[end].coalescable:
+                length += len(queue[end].content) + 1
+                if length > MESSAGE_LIMIT:
+                    break
+                batch.append(queue[end])
+                end += 1
+            del queue[index:end]
+        else:
+            del queue[index]
+        if not queue:
+            del self._pending[channel_id]
+        return batch
+
+    def _prune_buckets(self):
+        """Forgets buckets of idle channels that have fully refilled."""
+        now = clock.monotonic()
+        idle = [
+            channel_id for channel_id, bucket in self._channel_buckets.items()
+            if channel_id not in self._in_flight and bucket.delay(now) == 0 and bucket.tokens >= bucket.capacity
+        ]
+        for channel_id in idle:
+            del self._channel_buckets[channel_id]
+
+    async def _dispatch_loop(self):
+        while True:
+            self._wakeup.clear()
+            if len(self._in_flight) >= self.max_in_flight:
+                await self._wakeup.wait()
+                continue
+            channel_id, op = self._next_ready()
+            if channel_id is None:
+                if not self._pending:
+                    self._prune_buckets()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=op)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            batch = self._take_batch(channel_id, op)
+            now = clock.monotonic()
+            self._global_bucket.take(now)
+            self._bucket(channel_id).take(now)
+            self._in_flight.add(channel_id)
+            task = asyncio.create_task(self._execute(channel_id, batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _execute(self, channel_id, batch):
+        started = clock.monotonic()
+        for op in batch:
+            self._waits.append(started - op.enqueued_at)
+        head = batch[0]
+        try:
+            if head.kind == 'send':
+                content = '\n'.join(op.content for op in batch) if len(batch) > 1 else head.content
+                result = await head.target.send(content, **head.kwargs)
+            else:
+                result = await head.target.edit(content=head.content, **head.kwargs)
+            self.sent += 1
+            self.coalesced += len(batch) - 1
+            for op in batch:
+                for future in op.futures:
+                    if not future.done():
+                        future.set_result(result)
+        except Exception as e:
+            self.failed += 1
+            logger.error(f"Outbound {head.kind} to channel {channel_id} failed: {e}", exc_info=True)
+            for op in batch:
+                for future in op.futures:
+                    if not future.done():
+                        future.set_exception(e)
+        finally:
+            self._in_flight.discard(channel_id)
+            self._notify()
@@ -0,0 +1,127 @@
+# utils/profiling.py
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import Counter, deque
+
+import config
+
+logger = logging.getLogger(__name__)
+
+
+class LoopWatchdog:
+    """Measures event loop lag and logs the stack of whatever is blocking it.
+
+    A callback on the loop reschedules itself every `interval` seconds and
+    records how late it ran. A daemon thread watches that heartbeat; if the
+    loop has not ticked for longer than `threshold`, the thread grabs the
+    loop thread's current stack (the code that is hogging it) and logs it
+    once per stall. When the loop catches up, the total stall time is logged
+    too.
+    """
+
+    def __init__(self, threshold: float = config.LOOP_LAG_THRESHOLD, interval: float = 0.1,
+                 samples: int = 600):
+        self.threshold = threshold
+        self.interval = interval
+        self.stalls = 0
+        self.lag = deque(maxlen=samples)  # Seconds each recent tick ran late
+        self._loop = None
+        self._thread = None
+        self._handle = None
+        self._loop_thread_id = None
+        self._expected = 0.0
+        self._last_tick = 0.0
+        self._reported = False
+        self._stopped = threading.Event()
+
+    @property
+    def max_lag(self) -> float:
+        """Worst lag over the recent ticks, in seconds."""
+        return max(self.lag, default=0.0)
+
+    def start(self):
+        """Starts watching the running loop. Must be called from the loop's thread."""
+        if self._loop is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._last_tick = self._expected = time.perf_counter()
+        self._handle = self._loop.call_soon(self._tick)
+        self._thread = threading.Thread(target=self._watch, name='loop-watchdog', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._handle is not None:
+            self._handle.cancel()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+
+    def _tick(self):
+        now = time.perf_counter()
+        late = max(0.0, now - self._expected)
+        self.lag.append(late)
+        if late > self.threshold:
+            logger.warning(f"Event loop was blocked for {late * 1000:.0f}ms")
+        self._last_tick = now
+        self._reported = False
+        self._expected = now + self.interval
+        self._handle = self._loop.call_later(self.interval, self._tick)
+
+    def _watch(self):
+        # Poll several times per threshold so short stalls are still caught in the act
+        poll = min(self.interval, self.threshold / 4)
+        while not self._stopped.wait(poll):
+            stalled = time.perf_counter() - self._last_tick - self.interval
+            if stalled <= self.threshold or self._reported:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            self._reported = True
+            self.stalls += 1
+            stack = ''.join(traceback.format_stack(frame))
+            logger.warning(f"Event loop stalled for over {stalled * 1000:.0f}ms, currently running:\n{stack}")
+
+
+def _frame_name(code) -> str:
+    filename = code.co_filename
+    if filename.startswith(os.getcwd()):
+        filename = os.path.relpath(filename)
+    return f'{filename}:{code.co_name}'
+
+
+def collapse_stack(frame) -> str:
+    """Formats a frame and its callers root-first, separated by semicolons."""
+    names = []
+    while frame is not None:
+        names.append(_frame_name(frame.f_code))
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+def sample_stacks(thread_id: int, duration: float, interval: float) -> Counter:
+    """Samples a thread's stack every `interval` seconds for `duration` seconds.
+
+    Runs in its own thread, so it keeps sampling even while the sampled
+    thread (usually the event loop) is blocked. Returns {collapsed_stack: samples}.
+    """
+    counts = Counter()
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        frame = sys._current_frames().get(thread_id)
+        if frame is not None:
+            counts[collapse_stack(frame)] += 1
+        del frame
+        time.sleep(interval)
+    return counts
+
+
+def format_collapsed(counts: Counter) -> str:
+    """Renders samples in the collapsed-stack format flame graph tools read ("a;b;c 42" per line)."""
+    return ''.join(f'{stack} {count}\n' for stack, count in counts.most_common())
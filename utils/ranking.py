@@ -0,0 +1,136 @@
+# utils/ranking.py
+import math
+import random
+
+
+class _Node:
+    __slots__ = ('key', 'next', 'width')
+
+    def __init__(self, key, levels):
+        self.key = key
+        self.next = [None] * levels
+        self.width = [1] * levels
+
+
+class RankingIndex:
+    """Order-statistic index of players ranked by rating (then wins, then fewest losses).
+
+    Backed by an indexable skip list, so updating a player, looking up their
+    rank or percentile and reading the top K all cost O(log N) expected time
+    instead of a full sort of every player.
+    """
+
+    MAX_LEVELS = 24  # Comfortably covers ~16 million players
+
+    def __init__(self):
+        self._tail = _Node((math.inf,), 0)
+        self._head = _Node(None, self.MAX_LEVELS)
+        self._head.next = [self._tail] * self.MAX_LEVELS
+        self._keys = {}  # Format: {user_id: (-rating, -wins, losses, user_id)}
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, user_id):
+        return user_id in self._keys
+
+    @staticmethod
+    def _make_key(user_id, rating, wins, losses):
+        # Best players sort first: highest rating, most wins, fewest losses, then lowest ID for stability
+        return (-rating, -wins, losses, user_id)
+
+    def _find_chain(self, key):
+        """Returns the rightmost node before key on every level, plus steps taken per level."""
+        chain = [None] * self.MAX_LEVELS
+        steps_at_level = [0] * self.MAX_LEVELS
+        node = self._head
+        for level in reversed(range(self.MAX_LEVELS)):
+            while node.next[level].key < key:
+                steps_at_level[level] += node.width[level]
+                node = node.next[level]
+            chain[level] = node
+        return chain, steps_at_level
+
+    def _insert(self, key):
+        chain, steps_at_level = self._find_chain(key)
+        levels = 1
+        while levels < self.MAX_LEVELS and random.random() < 0.5:
+            levels += 1
+        new_node = _Node(key, levels)
+        steps = 0
+        for level in range(levels):
+            prev_node = chain[level]
+            new_node.next[level] = prev_node.next[level]
+            prev_node.next[level] = new_node
+            new_node.width[level] = prev_node.width[level] - steps
+            prev_node.width[level] = steps + 1
+            steps += steps_at_level[level]
+        for level in range(levels, self.MAX_LEVELS):
+            chain[level].width[level] += 1
+
+    def _remove(self, key):
+        chain, _ = self._find_chain(key)
+        node = chain[0].next[0]
+        for level in range(len(node.next)):
+            prev_node = chain[level]
+            prev_node.width[level] += node.width[level] - 1
+            prev_node.next[level] = node.next[level]
+        for level in range(len(node.next), self.MAX_LEVELS):
+            chain[level].width[level] -= 1
+
+    def update(self, user_id: int, rating: float, wins: int, losses: int):
+        """Inserts or moves a player to the position for their current rating and record."""
+        new_key = self._make_key(user_id, rating, wins, losses)
+        old_key = self._keys.get(user_id)
+        if old_key == new_key:
+            return
+        if old_key is not None:
+            self._remove(old_key)
+        self._insert(new_key)
+        self._keys[user_id] = new_key
+
+    def discard(self, user_id: int):
+        """Removes a player from the index if present."""
+        old_key = self._keys.pop(user_id, None)
+        if old_key is not None:
+            self._remove(old_key)
+
+    def rank(self, user_id: int) -> int | None:
+        """Returns a player's 1-based rank, or None if they are not ranked."""
+        key = self._keys.get(user_id)
+        if key is None:
+            return None
+        _, steps_at_level = self._find_chain(key)
+        return sum(steps_at_level) + 1
+
+    def percentile(self, user_id: int) -> float | None:
+        """Returns the percentage of other ranked players this player is ahead of, or None."""
+        rank = self.rank(user_id)
+        if rank is None:
+            return None
+        others = len(self._keys) - 1
+        return 100.0 * (others - (rank - 1)) / others if others else 100.0
+
+    def top(self, k: int = 10) -> list[tuple[int, float, int, int]]:
+        """Returns up to k (user_id, rating, wins, losses) tuples, best first."""
+        return self.page(0, k)
+
+    def page(self, offset: int, limit: int) -> list[tuple[int, float, int, int]]:
+        """Returns up to limit (user_id, rating, wins, losses) tuples starting at 0-based rank offset.
+
+        Skips to the offset along the upper levels, so a deep page costs
+        O(log N + limit) rather than walking every player above it.
+        """
+        node = self._head
+        passed = 0
+        for level in reversed(range(self.MAX_LEVELS)):
+            while node.next[level] is not self._tail and passed + node.width[level] <= offset:
+                passed += node.width[level]
+                node = node.next[level]
+        results = []
+        node = node.next[0]
+        while node is not self._tail and len(results) < limit:
+            neg_rating, neg_wins, losses, user_id = node.key
+            results.append((user_id, -neg_rating, -neg_wins, losses))
+            node = node.next[0]
+        return results
@@ -0,0 +1,34 @@
+# utils/rating.py
+"""Elo ratings for duel results.
+
+Each result updates the two players involved and nobody else, so applying
+a duel is O(1). New players move faster (a larger K-factor) until they have
+enough duels for their rating to be meaningful, which gives most of the
+benefit of Glicko's rating deviation without tracking it separately.
+"""
+
+DEFAULT_RATING = 1500.0
+
+# Duels before a player's rating is considered established
+PROVISIONAL_DUELS = 10
+
+PROVISIONAL_K = 40.0
+ESTABLISHED_K = 20.0
+
+
+def expected_score(rating: float, opponent_rating: float) -> float:
+    """Probability that a player rated `rating` beats one rated `opponent_rating`."""
+    return 1.0 / (1.0 + 10.0 ** ((opponent_rating - rating) / 400.0))
+
+
+def k_factor(duels: int) -> float:
+    return PROVISIONAL_K if duels < PROVISIONAL_DUELS else ESTABLISHED_K
+
+
+def rate_duel(winner_rating: float, loser_rating: float, winner_duels: int, loser_duels: int) -> tuple[float, float]:
+    """Returns the (winner, loser) ratings after a duel, given each player's duels before it."""
+    expected = expected_score(winner_rating, loser_rating)
+    return (
+        winner_rating + k_factor(winner_duels) * (1.0 - expected),
+        loser_rating - k_factor(loser_duels) * (1.0 - expected),
+    )
@@ -0,0 +1,65 @@
+# utils/response_cache.py
+import hashlib
+import json
+from collections import OrderedDict
+
+import config
+from utils import clock
+
+
+class _Entry:
+    __slots__ = ('body', 'etag', 'built_at')
+
+    def __init__(self, body, etag):
+        self.body = body
+        self.etag = etag
+        self.built_at = clock.monotonic()
+
+
+class ResponseCache:
+    """Encoded JSON responses of the public stats API, each reused for `ttl` seconds.
+
+    The ETag is a hash of the body, so when a response is rebuilt with the
+    same content it keeps its ETag and pollers sending If-None-Match keep
+    getting 304s. Within the TTL a request costs one dict lookup; after it,
+    one rebuild from the in-memory rankings. Least recently used entries are
+    evicted past `max_entries`.
+    """
+
+    def __init__(self, ttl: float = config.STATS_API_TTL, max_entries: int = 1000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self._entries = OrderedDict()  # Format: {key: _Entry}
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def make_etag(body: bytes) -> str:
+        return hashlib.blake2b(body, digest_size=12).hexdigest()
+
+    async def get(self, key, build) -> tuple[bytes, str]:
+        """Returns (body, etag) for key, calling the coroutine function build() for the payload if needed.
+
+        build returns a JSON-serializable payload.
+        """
+        entry = self._entries.get(key)
+        if entry is not None and clock.monotonic() - entry.built_at <= self.ttl:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.body, entry.etag
+        self.misses += 1
+        body = json.dumps(await build(), separators=(',', ':')).encode('utf-8')
+        entry = self._entries[key] = _Entry(body, self.make_etag(body))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return entry.body, entry.etag
+
+    def stats(self) -> dict[str, int]:
+        """Counters for metrics and debugging."""
+        return {'hits': self.hits, 'misses': self.misses, 'not_modified': self.not_modified,
+                'size': len(self._entries)}
@@ -0,0 +1,182 @@
+# utils/settings_db.py
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import config
+from utils.metrics import executor_queue_depth
+
+logger = logging.getLogger(__name__)
+
+# Versioned schema migrations, applied in order and tracked with PRAGMA user_version.
+# Never edit a released migration; append a new one instead.
+MIGRATIONS = [
+    # 1: Per-guild settings table (matches databases created before versioning)
+    '''
+    CREATE TABLE IF NOT EXISTS guild_settings (
+        guild_id INTEGER PRIMARY KEY,
+        game_channel_id INTEGER DEFAULT NULL
+    )
+    ''',
+    # 2: Small key/value store for bot state such as the last synced command tree hash
+    '''
+    CREATE TABLE IF NOT EXISTS bot_meta (
+        key TEXT PRIMARY KEY,
+        value TEXT NOT NULL
+    )
+    ''',
+]
+
+
+class SettingsDatabase:
+    """Access layer for settings.db with long-lived connections on a private executor.
+
+    Each worker thread of the bounded executor keeps one WAL-mode connection
+    open for the life of the bot, so calls never pay connection setup and
+    reuse the connection's prepared statements, and settings traffic never
+    waits behind other work on the default executor.
+    """
+
+    def __init__(self, path: str = config.SETTINGS_DB_FILE, workers: int = config.SETTINGS_DB_WORKERS):
+        self.path = path
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='settings-db')
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        self._opened = False
+        self._closed = False
+
+    # --- Executor-side helpers (never call these from the event loop) ---
+
+    def _connection(self):
+        """Returns this worker thread's connection, opening it on first use."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    def _migrate(self):
+        """Applies any migrations newer than the database's user_version."""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._connection()
+        version = conn.execute('PRAGMA user_version').fetchone()[0]
+        for number, statement in enumerate(MIGRATIONS[version:], start=version + 1):
+            with conn:
+                conn.execute(statement)
+                # PRAGMA does not accept parameters; number is always an int we control
+                conn.execute(f'PRAGMA user_version = {number}')
+            logger.info(f"Applied settings database migration {number}")
+        return len(MIGRATIONS)
+
+    def _set_game_channel(self, guild_id, channel_id):
+        conn = self._connection()
+        with conn:
+            conn.execute('''
+                INSERT INTO guild_settings (guild_id, game_channel_id) VALUES (?, ?)
+                ON CONFLICT(guild_id) DO UPDATE SET game_channel_id = excluded.game_channel_id
+            ''', (guild_id, channel_id))
+
+    def _get_game_channel(self, guild_id):
+        row = self._connection().execute(
+            'SELECT game_channel_id FROM guild_settings WHERE guild_id = ?', (guild_id,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def _all_game_channels(self):
+        return dict(self._connection().execute(
+            'SELECT guild_id, game_channel_id FROM guild_settings WHERE game_channel_id IS NOT NULL'
+        ).fetchall())
+
+    def _get_meta(self, key):
+        row = self._connection().execute('SELECT value FROM bot_meta WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key, value):
+        conn = self._connection()
+        with conn:
+            conn.execute('INSERT OR REPLACE INTO bot_meta (key, value) VALUES (?, ?)', (key, value))
+
+    # --- Public async API ---
+
+    async def _run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    @property
+    def is_open(self) -> bool:
+        return self._opened and not self._closed
+
+    @property
+    def queue_depth(self) -> int:
+        """Database calls waiting for a worker thread."""
+        return executor_queue_depth(self._executor)
+
+    async def open(self):
+        """Creates the database if needed and brings its schema up to date."""
+        version = await self._run(self._migrate)
+        self._opened = True
+        logger.info(f"Settings database ready at {self.path} (schema version {version})")
+
+    async def set_game_channel(self, guild_id: int, channel_id: int | None) -> bool:
+        """Sets or clears the game channel ID for a guild. Returns False on a database error."""
+        try:
+            await self._run(self._set_game_channel, guild_id, channel_id)
+        except sqlite3.Error as e:
+            logger.error(f"Error setting game channel for guild {guild_id}: {e}", exc_info=True)
+            return False
+        logger.info(f"Set game channel for guild {guild_id} to {channel_id}")
+        return True
+
+    async def get_game_channel(self, guild_id: int) -> int | None:
+        """Gets the configured game channel ID for a guild."""
+        try:
+            return await self._run(self._get_game_channel, guild_id)
+        except sqlite3.Error as e:
+            logger.error(f"Error getting game channel for guild {guild_id}: {e}", exc_info=True)
+            return None
+
+    async def all_game_channels(self) -> dict[int, int]:
+        """Gets the configured game channel ID of every guild that has one."""
+        try:
+            return await self._run(self._all_game_channels)
+        except sqlite3.Error as e:
+            logger.error(f"Error loading game channels: {e}", exc_info=True)
+            return {}
+
+    async def get_meta(self, key: str) -> str | None:
+        """Gets a bot state value, or None if it was never set or cannot be read."""
+        try:
+            return await self._run(self._get_meta, key)
+        except sqlite3.Error as e:
+            logger.error(f"Error reading bot state {key}: {e}", exc_info=True)
+            return None
+
+    async def set_meta(self, key: str, value: str) -> bool:
+        """Stores a bot state value. Returns False on a database error."""
+        try:
+            await self._run(self._set_meta, key, value)
+        except sqlite3.Error as e:
+            logger.error(f"Error saving bot state {key}: {e}", exc_info=True)
+            return False
+        return True
+
+    async def close(self):
+        """Shuts down the executor and closes every pooled connection. Safe to call twice."""
+        if self._closed:
+            return
+        self._closed = True
+        self._executor.shutdown(wait=True)
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
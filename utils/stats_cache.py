@@ -0,0 +1,86 @@
+# utils/stats_cache.py
+from collections import OrderedDict
+
+import config
+
+
+class PlayerStatsCache:
+    """Read-through LRU cache of player rows in front of the StatsStore.
+
+    Entries are keyed by (guild_id, user_id), with guild_id None for a
+    player's global totals, and a None row records that the player has not
+    dueled there yet. Cached entries are updated in place from the store's
+    write listener, so they never go stale; rows for players nobody has
+    looked up are not added, so a busy tournament cannot flush the players
+    people are actually checking. Once full, the least recently read entry
+    is evicted.
+
+    Reads and writes share the store's single thread, so a read that missed
+    is always cached before any write queued behind it is applied.
+    """
+
+    def __init__(self, store, max_size: int = config.STATS_CACHE_SIZE):
+        self.store = store
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._cache = OrderedDict()  # Format: {(guild_id or None, user_id): row or None}
+        self._generation = store.generation
+
+    def __len__(self):
+        return len(self._cache)
+
+    def _put(self, key, row):
+        self._cache[key] = row
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.max_size:
+            self._cache.popitem(last=False)
+
+    def _check_generation(self):
+        # A rebuild rewrites every row without reporting them, so start over
+        if self.store.generation != self._generation:
+            self._generation = self.store.generation
+            self._cache.clear()
+
+    def on_write(self, rows, guild_rows):
+        """StatsStore listener: refreshes cached entries for the rows a write committed."""
+        self._check_generation()
+        for user_id, row in rows.items():
+            if (None, user_id) in self._cache:
+                self._cache[(None, user_id)] = row
+        for guild_id, partition in guild_rows.items():
+            for user_id, row in partition.items():
+                if (guild_id, user_id) in self._cache:
+                    self._cache[(guild_id, user_id)] = row
+
+    async def get_summary(self, user_id: int, guild_id: int) -> tuple[dict | None, dict | None]:
+        """Returns a player's (guild row, global row), reading the store only on a miss."""
+        self._check_generation()
+        guild_key, global_key = (guild_id, user_id), (None, user_id)
+        if guild_key in self._cache and global_key in self._cache:
+            self.hits += 1
+            self._cache.move_to_end(guild_key)
+            self._cache.move_to_end(global_key)
+            return self._cache[guild_key], self._cache[global_key]
+        self.misses += 1
+        guild_row, global_row = await self.store.get_player_summary(user_id, guild_id)
+        self._put(global_key, global_row)
+        self._put(guild_key, guild_row)
+        return guild_row, global_row
+
+    async def get(self, user_id: int, guild_id: int | None = None) -> dict | None:
+        """Returns one player row (global totals without a guild_id), reading the store only on a miss."""
+        self._check_generation()
+        key = (guild_id, user_id)
+        if key in self._cache:
+            self.hits += 1
+            self._cache.move_to_end(key)
+            return self._cache[key]
+        self.misses += 1
+        row = await self.store.get_player(user_id, guild_id)
+        self._put(key, row)
+        return row
+
+    def stats(self) -> dict[str, int]:
+        """Counters for metrics and debugging."""
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self._cache)}
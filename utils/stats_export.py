@@ -0,0 +1,58 @@
+# utils/stats_export.py
+import csv
+import io
+import json
+
+from utils.stats_store import EXPORT_COLUMNS
+
+FORMATS = ('csv', 'ndjson')
+CONTENT_TYPES = {'csv': 'text/csv', 'ndjson': 'application/x-ndjson'}
+
+# How each column is read back from text; guild_id is empty for duels outside a guild
+_COLUMN_TYPES = {
+    'id': int, 'user_id': int, 'guild_id': int, 'winner_id': int, 'loser_id': int,
+    'wins': int, 'losses': int, 'duels': int, 'rating': float, 'recorded_at': float, 'source': str,
+}
+
+
+def _format_page(kind, fmt, page) -> str:
+    if fmt == 'ndjson':
+        columns = EXPORT_COLUMNS[kind]
+        return ''.join(json.dumps(dict(zip(columns, row)), separators=(',', ':')) + '\n' for row in page)
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator='\n').writerows(page)
+    return buffer.getvalue()
+
+
+async def stream_export(store, kind: str, fmt: str, batch_size: int = 1000):
+    """Yields an export as text chunks, one page of rows per chunk (CSV starts with a header row)."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format {fmt!r}")
+    if kind not in EXPORT_COLUMNS:
+        raise ValueError(f"Unknown export {kind!r}")
+    if fmt == 'csv':
+        yield ','.join(EXPORT_COLUMNS[kind]) + '\n'
+    async for page in store.export_rows(kind, batch_size):
+        yield _format_page(kind, fmt, page)
+
+
+def _convert(column, value):
+    if value is None or value == '':
+        return None
+    return _COLUMN_TYPES[column](value)
+
+
+def parse_rows(kind: str, fmt: str, lines):
+    """Parses lines of an export back into row tuples, lazily, for StatsStore.import_rows."""
+    columns = EXPORT_COLUMNS[kind]
+    if fmt == 'csv':
+        records = csv.DictReader(lines)
+    elif fmt == 'ndjson':
+        records = (json.loads(line) for line in lines if line.strip())
+    else:
+        raise ValueError(f"Unknown format {fmt!r}")
+    for record in records:
+        try:
+            yield tuple(_convert(column, record[column]) for column in columns)
+        except (KeyError, ValueError) as e:
+            raise ValueError(f"Bad {kind} row {record!r}: {e}") from e
@@ -0,0 +1,839 @@
+# utils/stats_store.py
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import config
+from utils.metrics import STATS_WRITE_DURATION, executor_queue_depth
+from utils.ranking import RankingIndex
+from utils.rating import DEFAULT_RATING, rate_duel
+
+logger = logging.getLogger(__name__)
+
+# Columns of each bulk export, in order. The leading key columns are also the
+# order pages are read in, so an export never needs more than one page in memory.
+EXPORT_COLUMNS = {
+    'players': ('user_id', 'wins', 'losses', 'duels', 'rating'),
+    'guilds': ('guild_id', 'user_id', 'wins', 'losses', 'duels', 'rating'),
+    'snapshot': ('guild_id', 'user_id', 'wins', 'losses', 'duels', 'rating'),
+    'duels': ('id', 'winner_id', 'loser_id', 'guild_id', 'recorded_at', 'source'),
+}
+_EXPORT_SOURCES = {  # Format: {kind: (table, key columns)}
+    'players': ('player_stats', ('user_id',)),
+    'guilds': ('guild_stats', ('guild_id', 'user_id')),
+    'snapshot': ('stats_snapshot', ('guild_id', 'user_id')),
+    'duels': ('duel_results', ('id',)),
+}
+# Export kinds import_rows can load
+IMPORT_KINDS = ('snapshot', 'duels')
+
+
+class StatsStore:
+    """SQLite-backed player statistics shared by every cog.
+
+    Stats are partitioned per (guild, user) in guild_stats, with a rolled-up
+    row per user in player_stats holding their totals across every guild, so
+    guild leaderboards and global totals are both a single indexed lookup.
+    Results are applied to both inside one transaction, so concurrent duels
+    can never overwrite each other. All database work runs on a dedicated
+    single-thread executor to keep file I/O off the event loop.
+
+    Each result also updates both players' Elo ratings in the same
+    transaction and is appended to duel_results, an event log of (winner,
+    loser, guild, timestamp, source). The aggregates can always be rebuilt
+    from stats_snapshot plus a replay of the events logged after it; a
+    background task periodically folds events older than the retention
+    window into the snapshot and deletes them, so the log stays short.
+
+    The store also maintains an in-memory RankingIndex of global totals,
+    plus one per guild built lazily on first use, all updated from the
+    committed rows after every write. Registered listeners are notified with
+    those rows so other in-memory views can stay consistent; a full rebuild
+    instead bumps `generation`, telling them to drop what they hold.
+
+    Every write stamps the changed rows with a store-wide sequence number.
+    When several shard processes share one database, pass sync_interval so
+    each process polls for rows written by the others and applies them too.
+    """
+
+    def __init__(self, path: str = config.STATS_DB_FILE, legacy_file: str | None = config.DATA_FILE,
+                 sync_interval: float | None = None, retention: float | None = config.EVENT_LOG_RETENTION,
+                 compact_interval: float = config.EVENT_LOG_COMPACT_INTERVAL):
+        self.path = path
+        self.legacy_file = legacy_file
+        self.sync_interval = sync_interval
+        self.retention = retention  # Seconds of events kept in the log; None disables compaction
+        self.compact_interval = compact_interval
+        self._compact_task = None
+        self._conn = None
+        self._closed = False
+        self._seen_seq = 0
+        self._data_version = None
+        self._sync_task = None
+        self.write_timings = deque(maxlen=1000)  # Seconds spent in recent write transactions
+        self._listeners = []
+        self.generation = 0  # Bumped whenever every aggregate is rebuilt at once
+        self.ranking = RankingIndex()
+        self._guild_rankings = {}  # Format: {guild_id: RankingIndex}, only for guilds asked about
+        self._guild_loading = {}  # Format: {guild_id: Future} while a guild's index is being built
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='stats-store')
+
+    # --- Executor-side helpers (never call these from the event loop) ---
+
+    def _open(self):
+        """Opens the connection, creates the schema and migrates legacy data."""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # isolation_level=None lets us manage transactions explicitly
+        self._conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        # Shard processes may open a new database at the same time, and DDL is transactional
+        # in SQLite, so the schema is checked and upgraded under the write lock
+        self._conn.execute('BEGIN IMMEDIATE')
+        try:
+            self._create_schema()
+            self._conn.execute('COMMIT')
+        except Exception:
+            self._conn.execute('ROLLBACK')
+            raise
+        self._migrate_event_ids()
+        self._migrate_legacy_json()
+        self._init_snapshot()
+        self._seen_seq = self._conn.execute('SELECT COALESCE(MAX(updated_seq), 0) FROM player_stats').fetchone()[0]
+        self._data_version = self._conn.execute('PRAGMA data_version').fetchone()[0]
+
+    def _create_schema(self):
+        """Creates missing tables and adds columns older databases lack. Runs inside a write transaction."""
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS player_stats (
+                user_id INTEGER PRIMARY KEY,
+                wins INTEGER NOT NULL DEFAULT 0,
+                losses INTEGER NOT NULL DEFAULT 0,
+                duels INTEGER NOT NULL DEFAULT 0,
+                updated_seq INTEGER NOT NULL DEFAULT 0,
+                rating REAL NOT NULL DEFAULT 1500
+            )
+        ''')
+        columns = {row[1] for row in self._conn.execute('PRAGMA table_info(player_stats)')}
+        if 'updated_seq' not in columns:
+            # Databases created before cross-process sync existed
+            self._conn.execute('ALTER TABLE player_stats ADD COLUMN updated_seq INTEGER NOT NULL DEFAULT 0')
+        if 'rating' not in columns:
+            # Databases created before ratings existed; everyone starts at the default
+            self._conn.execute(f'ALTER TABLE player_stats ADD COLUMN rating REAL NOT NULL DEFAULT {DEFAULT_RATING}')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_player_stats_seq ON player_stats (updated_seq)')
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS guild_stats (
+                guild_id INTEGER NOT NULL,
+                user_id INTEGER NOT NULL,
+                wins INTEGER NOT NULL DEFAULT 0,
+                losses INTEGER NOT NULL DEFAULT 0,
+                duels INTEGER NOT NULL DEFAULT 0,
+                rating REAL NOT NULL DEFAULT 1500,
+                updated_seq INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (guild_id, user_id)
+            ) WITHOUT ROWID
+        ''')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_guild_stats_seq ON guild_stats (updated_seq)')
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS duel_results (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                winner_id INTEGER NOT NULL,
+                loser_id INTEGER NOT NULL,
+                recorded_at REAL NOT NULL,
+                guild_id INTEGER,
+                source TEXT NOT NULL DEFAULT 'duel'
+            )
+        ''')
+        event_columns = {row[1] for row in self._conn.execute('PRAGMA table_info(duel_results)')}
+        if 'guild_id' not in event_columns:
+            # History recorded before stats were partitioned by guild
+            self._conn.execute('ALTER TABLE duel_results ADD COLUMN guild_id INTEGER')
+        if 'source' not in event_columns:
+            self._conn.execute("ALTER TABLE duel_results ADD COLUMN source TEXT NOT NULL DEFAULT 'duel'")
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS stats_snapshot (
+                guild_id INTEGER NOT NULL,
+                user_id INTEGER NOT NULL,
+                wins INTEGER NOT NULL,
+                losses INTEGER NOT NULL,
+                duels INTEGER NOT NULL,
+                rating REAL NOT NULL,
+                PRIMARY KEY (guild_id, user_id)
+            ) WITHOUT ROWID
+        ''')
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS store_meta (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            )
+        ''')
+
+    def _has_autoincrement_ids(self):
+        table_sql = self._conn.execute(
+            "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'duel_results'"
+        ).fetchone()[0]
+        return 'AUTOINCREMENT' in table_sql.upper()
+
+    def _migrate_event_ids(self):
+        """Rebuilds duel_results with AUTOINCREMENT if it predates compaction.
+
+        Compaction deletes old events, and without AUTOINCREMENT SQLite could
+        hand their IDs out again, putting new events behind the snapshot.
+        """
+        if self._has_autoincrement_ids():
+            return
+        self._conn.execute('BEGIN IMMEDIATE')
+        try:
+            # Another shard process may have migrated it while we waited for the lock
+            if self._has_autoincrement_ids():
+                self._conn.execute('COMMIT')
+                return
+            self._conn.execute('''
+                CREATE TABLE duel_results_new (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    winner_id INTEGER NOT NULL,
+                    loser_id INTEGER NOT NULL,
+                    recorded_at REAL NOT NULL,
+                    guild_id INTEGER,
+                    source TEXT NOT NULL DEFAULT 'duel'
+                )
+            ''')
+            self._conn.execute('''
+                INSERT INTO duel_results_new (id, winner_id, loser_id, recorded_at, guild_id, source)
+                SELECT id, winner_id, loser_id, recorded_at, guild_id, source FROM duel_results
+            ''')
+            self._conn.execute('DROP TABLE duel_results')
+            self._conn.execute('ALTER TABLE duel_results_new RENAME TO duel_results')
+            self._conn.execute('COMMIT')
+        except Exception:
+            self._conn.execute('ROLLBACK')
+            raise
+
+    def _legacy_json_migrated(self):
+        return self._conn.execute(
+            "SELECT 1 FROM store_meta WHERE key = 'legacy_json_migrated'"
+        ).fetchone() is not None
+
+    def _migrate_legacy_json(self):
+        """Imports stats.json once; the meta flag stops it from running again.
+
+        With legacy_file None nothing is imported, but the flag is still set,
+        so a store created that way never picks up stats.json later.
+        """
+        if self._legacy_json_migrated():
+            return
+
+        stats = {}
+        try:
+            if self.legacy_file is not None:
+                with open(self.legacy_file, 'r') as f:
+                    stats = json.load(f)
+        except FileNotFoundError:
+            pass
+        except json.JSONDecodeError as e:
+            logger.error(f"Legacy stats file {self.legacy_file} is invalid, skipping migration: {e}")
+
+        rows = [
+            (int(player_id), s.get('wins', 0), s.get('losses', 0), s.get('duels', 0))
+            for player_id, s in stats.items()
+        ]
+
+        self._conn.execute('BEGIN IMMEDIATE')
+        try:
+            # Another shard process may have migrated it while we waited for the lock
+            if self._legacy_json_migrated():
+                self._conn.execute('COMMIT')
+                return
+            self._conn.executemany('''
+                INSERT INTO player_stats (user_id, wins, losses, duels)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(user_id) DO UPDATE SET
+                    wins = wins + excluded.wins,
+                    losses = losses + excluded.losses,
+                    duels = duels + excluded.duels
+            ''', rows)
+            self._conn.execute(
+                "INSERT INTO store_meta (key, value) VALUES ('legacy_json_migrated', ?)",
+                (str(len(rows)),)
+            )
+            self._conn.execute('COMMIT')
+        except Exception:
+            self._conn.execute('ROLLBACK')
+            raise
+        if rows:
+            logger.info(f"Migrated {len(rows)} players from {self.legacy_file} into {self.path}")
+
+    def _record_results(self, results, guild_id, source):
+        """Applies (winner_id, loser_id) pairs from one guild in a single transaction.
+
+        Returns the committed global rows of every affected player as
+        {user_id: {'wins', 'losses', 'duels', 'rating'}}, and their rows in
+        the guild's partition as {guild_id: {user_id: row}}.
+        """
+        started = time.perf_counter()
+        now = time.time()
+        rows, guild_rows = self._write_events(
+            [(winner_id, loser_id, guild_id, now, source) for winner_id, loser_id in results]
+        )
+        elapsed = time.perf_counter() - started
+        self.write_timings.append(elapsed)
+        STATS_WRITE_DURATION.observe(elapsed)
+        return rows, guild_rows
+
+    def _write_events(self, events):
+        """Logs (winner_id, loser_id, guild_id, recorded_at, source) events and applies them in one transaction.
+
+        Returns the committed (rows, guild_rows) like _record_results.
+        """
+        self._conn.execute('BEGIN IMMEDIATE')
+        try:
+            seq = self._next_seq()
+            # The write lock is held, so rows read here cannot change under us;
+            # each result then costs O(1) in memory and every row is written once
+            rows = {}
+            guild_rows = {}  # Format: {guild_id: {user_id: row}}
+            for winner_id, loser_id, guild_id, _, _ in events:
+                self._rate(rows, self._get_player, winner_id, loser_id)
+                if guild_id is not None:
+                    self._rate(
+                        guild_rows.setdefault(guild_id, {}),
+                        lambda user_id, guild_id=guild_id: self._get_guild_player(guild_id, user_id),
+                        winner_id, loser_id
+                    )
+            self._conn.executemany(
+                'INSERT INTO duel_results (winner_id, loser_id, guild_id, recorded_at, source) VALUES (?, ?, ?, ?, ?)',
+                events
+            )
+            self._conn.executemany('''
+                INSERT INTO player_stats (user_id, wins, losses, duels, rating, updated_seq) VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(user_id) DO UPDATE SET
+                    wins = excluded.wins, losses = excluded.losses, duels = excluded.duels,
+                    rating = excluded.rating, updated_seq = excluded.updated_seq
+            ''', [
+                (user_id, row['wins'], row['losses'], row['duels'], row['rating'], seq)
+                for user_id, row in rows.items()
+            ])
+            self._conn.executemany('''
+                INSERT INTO guild_stats (guild_id, user_id, wins, losses, duels, rating, updated_seq)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(guild_id, user_id) DO UPDATE SET
+                    wins = excluded.wins, losses = excluded.losses, duels = excluded.duels,
+                    rating = excluded.rating, updated_seq = excluded.updated_seq
+            ''', [
+                (guild_id, user_id, row['wins'], row['losses'], row['duels'], row['rating'], seq)
+                for guild_id, partition in guild_rows.items() for user_id, row in partition.items()
+            ])
+            self._conn.execute('COMMIT')
+        except Exception:
+            self._conn.execute('ROLLBACK')
+            raise
+        return rows, guild_rows
+
+    @staticmethod
+    def _new_player():
+        return {'wins': 0, 'losses': 0, 'duels': 0, 'rating': DEFAULT_RATING}
+
+    def _rate(self, rows, load, winner_id, loser_id):
+        """Applies one result to the rows being written, loading each player's row on first touch."""
+        winner = rows.get(winner_id) or load(winner_id) or self._new_player()
+        loser = rows.get(loser_id) or load(loser_id) or self._new_player()
+        winner['rating'], loser['rating'] = rate_duel(
+            winner['rating'], loser['rating'], winner['duels'], loser['duels']
+        )
+        winner['wins'] += 1
+        winner['duels'] += 1
+        loser['losses'] += 1
+        loser['duels'] += 1
+        rows[winner_id], rows[loser_id] = winner, loser
+
+    def _snapshot_event_id(self):
+        row = self._conn.execute("SELECT value FROM store_meta WHERE key = 'snapshot_event_id'").fetchone()
+        return int(row[0]) if row else None
+
+    def _init_snapshot(self):
+        """Seeds the snapshot from the current aggregates the first time the event log is used."""
+        if self._snapshot_event_id() is not None:
+            return
+        self._conn.execute('BEGIN IMMEDIATE')
+        try:
+            # Another shard process may have seeded it while we waited for the lock
+            if self._snapshot_event_id() is not None:
+                self._conn.execute('COMMIT')
+                return
+            # Aggregates already include every event logged so far (and any imported
+            # stats.json totals), so they become the snapshot as of the newest event
+            self._conn.execute('''
+                INSERT OR REPLACE INTO stats_snapshot (guild_id, user_id, wins, losses, duels, rating)
+                SELECT 0, user_id, wins, losses, duels, rating FROM player_stats
+            ''')
+            self._conn.execute('''
+                INSERT OR REPLACE INTO stats_snapshot (guild_id, user_id, wins, losses, duels, rating)
+                SELECT guild_id, user_id, wins, losses, duels, rating FROM guild_stats
+            ''')
+            last_id = self._conn.execute('SELECT COALESCE(MAX(id), 0) FROM duel_results').fetchone()[0]
+            self._conn.execute(
+                "INSERT INTO store_meta (key, value) VALUES ('snapshot_event_id', ?)", (str(last_id),)
+            )
+            self._conn.execute('COMMIT')
+        except Exception:
+            self._conn.execute('ROLLBACK')
+            raise
+
+    def _get_snapshot_row(self, guild_key, user_id):
+        row = self._conn.execute(
+            'SELECT wins, losses, duels, rating FROM stats_snapshot WHERE guild_id = ? AND user_id = ?',
+            (guild_key, user_id)
+        ).fetchone()
+        if row is None:
+            return None
+        return {'wins': row[0], 'losses': row[1], 'duels': row[2], 'rating': row[3]}
+
+    def _compact(self, cutoff, batch_size):
+        """Folds events recorded before cutoff into the snapshot and deletes them.
+
+        Only the run of events at the start of the log that are all older
+        than cutoff is folded: the snapshot covers every ID up to its
+        snapshot_event_id, and IDs do not follow recorded_at for imported
+        events or shards racing for the write lock. Works in batches of
+        short transactions so duel writes are never held up for long.
+        Returns the number of events compacted.
+        """
+        compacted = 0
+        while True:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                snapshot_id = self._snapshot_event_id()
+                events = self._conn.execute('''
+                    SELECT id, winner_id, loser_id, guild_id, recorded_at FROM duel_results
+                    WHERE id > ? ORDER BY id LIMIT ?
+                ''', (snapshot_id, batch_size)).fetchall()
+                done = len(events) < batch_size
+                for index, event in enumerate(events):
+                    if event[4] >= cutoff:
+                        events = events[:index]
+                        done = True
+                        break
+                if not events:
+                    self._conn.execute('COMMIT')
+                    return compacted
+                partitions = {}  # Format: {guild_key: {user_id: row}}, guild_key 0 being the global totals
+                for _, winner_id, loser_id, guild_id, _ in events:
+                    for guild_key in (0,) if guild_id is None else (0, guild_id):
+                        self._rate(
+                            partitions.setdefault(guild_key, {}),
+                            lambda user_id, guild_key=guild_key: self._get_snapshot_row(guild_key, user_id),
+                            winner_id, loser_id
+                        )
+                self._conn.executemany('''
+                    INSERT OR REPLACE INTO stats_snapshot (guild_id, user_id, wins, losses, duels, rating)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                ''', [
+                    (guild_key, user_id, row['wins'], row['losses'], row['duels'], row['rating'])
+                    for guild_key, rows in partitions.items() for user_id, row in rows.items()
+                ])
+                last_id = events[-1][0]
+                self._conn.execute('DELETE FROM duel_results WHERE id <= ?', (last_id,))
+                self._conn.execute(
+                    "UPDATE store_meta SET value = ? WHERE key = 'snapshot_event_id'", (str(last_id),)
+                )
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+            compacted += len(events)
+            if done:
+                return compacted
+
+    def _rebuild_from_log(self, batch_size):
+        """Recomputes every aggregate from the snapshot plus a replay of the events after it.
+
+        Runs in one transaction and rewrites player_stats and guild_stats, so
+        it also repairs aggregates that drifted from the log. Returns the
+        global rows of every player and the number of events replayed.
+        """
+        self._conn.execute('BEGIN IMMEDIATE')
+        try:
+            partitions = {}  # Format: {guild_key: {user_id: row}}, guild_key 0 being the global totals
+            for guild_key, user_id, wins, losses, duels, rating in self._conn.execute(
+                'SELECT guild_id, user_id, wins, losses, duels, rating FROM stats_snapshot'
+            ):
+                partitions.setdefault(guild_key, {})[user_id] = {
+                    'wins': wins, 'losses': losses, 'duels': duels, 'rating': rating
+                }
+            replayed = 0
+            cursor = self._conn.execute(
+                'SELECT winner_id, loser_id, guild_id FROM duel_results WHERE id > ? ORDER BY id',
+                (self._snapshot_event_id(),)
+            )
+            while batch := cursor.fetchmany(batch_size):
+                for winner_id, loser_id, guild_id in batch:
+                    for guild_key in (0,) if guild_id is None else (0, guild_id):
+                        self._rate(partitions.setdefault(guild_key, {}), lambda user_id: None, winner_id, loser_id)
+                replayed += len(batch)
+            seq = self._next_seq()
+            rows = partitions.pop(0, {})
+            self._conn.execute('DELETE FROM player_stats')
+            self._conn.executemany(
+                'INSERT INTO player_stats (user_id, wins, losses, duels, rating, updated_seq) VALUES (?, ?, ?, ?, ?, ?)',
+                [(user_id, r['wins'], r['losses'], r['duels'], r['rating'], seq) for user_id, r in rows.items()]
+            )
+            self._conn.execute('DELETE FROM guild_stats')
+            self._conn.executemany(
+                '''INSERT INTO guild_stats (guild_id, user_id, wins, losses, duels, rating, updated_seq)
+                   VALUES (?, ?, ?, ?, ?, ?, ?)''',
+                [
+                    (guild_id, user_id, r['wins'], r['losses'], r['duels'], r['rating'], seq)
+                    for guild_id, guild_rows in partitions.items() for user_id, r in guild_rows.items()
+                ]
+            )
+            self._conn.execute('COMMIT')
+        except Exception:
+            self._conn.execute('ROLLBACK')
+            raise
+        return rows, replayed
+
+    def _export_page(self, kind, after, limit):
+        """Reads up to limit rows of an export, starting after the key tuple `after` (None for the start)."""
+        table, key = _EXPORT_SOURCES[kind]
+        key_sql = ', '.join(key)
+        where, params = '', ()
+        if after is not None:
+            where, params = f"WHERE ({key_sql}) > ({', '.join('?' * len(key))})", tuple(after)
+        return self._conn.execute(
+            f"SELECT {', '.join(EXPORT_COLUMNS[kind])} FROM {table} {where} ORDER BY {key_sql} LIMIT ?",
+            (*params, limit)
+        ).fetchall()
+
+    def _is_empty(self):
+        return (
+            self._conn.execute('SELECT 1 FROM player_stats LIMIT 1').fetchone() is None
+            and self._conn.execute('SELECT 1 FROM duel_results LIMIT 1').fetchone() is None
+        )
+
+    def _import_snapshot(self, snapshot_rows):
+        """Loads (guild_id, user_id, wins, losses, duels, rating) rows into the snapshot and aggregates.
+
+        Only valid on an empty store, where the aggregates equal the snapshot.
+        """
+        self._conn.execute('BEGIN IMMEDIATE')
+        try:
+            seq = self._next_seq()
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO stats_snapshot (guild_id, user_id, wins, losses, duels, rating) VALUES (?, ?, ?, ?, ?, ?)',
+                snapshot_rows
+            )
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO player_stats (user_id, wins, losses, duels, rating, updated_seq) VALUES (?, ?, ?, ?, ?, ?)',
+                [(*row[1:], seq) for row in snapshot_rows if row[0] == 0]
+            )
+            self._conn.executemany(
+                '''INSERT OR REPLACE INTO guild_stats (guild_id, user_id, wins, losses, duels, rating, updated_seq)
+                   VALUES (?, ?, ?, ?, ?, ?, ?)''',
+                [(*row, seq) for row in snapshot_rows if row[0] != 0]
+            )
+            self._conn.execute('COMMIT')
+        except Exception:
+            self._conn.execute('ROLLBACK')
+            raise
+
+    def _next_seq(self):
+        """Bumps the store-wide write sequence. Must run inside a write transaction."""
+        row = self._conn.execute("SELECT value FROM store_meta WHERE key = 'write_seq'").fetchone()
+        seq = (int(row[0]) if row else 0) + 1
+        self._conn.execute("INSERT OR REPLACE INTO store_meta (key, value) VALUES ('write_seq', ?)", (str(seq),))
+        return seq
+
+    def _changes_since_last_sync(self):
+        """Returns (rows, guild_rows) written since the last sync by any process, empty if nothing changed."""
+        data_version = self._conn.execute('PRAGMA data_version').fetchone()[0]
+        if data_version == self._data_version:
+            return {}, {}
+        self._data_version = data_version
+        rows = {}
+        guild_rows = {}
+        # Every write bumps the global rows, so their highest seq covers the guild rows too
+        seen_seq = self._seen_seq
+        for user_id, wins, losses, duels, rating, seq in self._conn.execute(
+            'SELECT user_id, wins, losses, duels, rating, updated_seq FROM player_stats WHERE updated_seq > ?',
+            (seen_seq,)
+        ):
+            rows[user_id] = {'wins': wins, 'losses': losses, 'duels': duels, 'rating': rating}
+            self._seen_seq = max(self._seen_seq, seq)
+        for guild_id, user_id, wins, losses, duels, rating in self._conn.execute(
+            'SELECT guild_id, user_id, wins, losses, duels, rating FROM guild_stats WHERE updated_seq > ? AND updated_seq <= ?',
+            (seen_seq, self._seen_seq)
+        ):
+            guild_rows.setdefault(guild_id, {})[user_id] = {
+                'wins': wins, 'losses': losses, 'duels': duels, 'rating': rating
+            }
+        return rows, guild_rows
+
+    def _get_player(self, user_id):
+        row = self._conn.execute(
+            'SELECT wins, losses, duels, rating FROM player_stats WHERE user_id = ?', (user_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        return {'wins': row[0], 'losses': row[1], 'duels': row[2], 'rating': row[3]}
+
+    def _get_guild_player(self, guild_id, user_id):
+        row = self._conn.execute(
+            'SELECT wins, losses, duels, rating FROM guild_stats WHERE guild_id = ? AND user_id = ?',
+            (guild_id, user_id)
+        ).fetchone()
+        if row is None:
+            return None
+        return {'wins': row[0], 'losses': row[1], 'duels': row[2], 'rating': row[3]}
+
+    def _get_player_summary(self, user_id, guild_id):
+        return self._get_guild_player(guild_id, user_id), self._get_player(user_id)
+
+    def _build_ranking(self):
+        ranking = RankingIndex()
+        for user_id, wins, losses, rating in self._conn.execute(
+            'SELECT user_id, wins, losses, rating FROM player_stats'
+        ):
+            ranking.update(user_id, rating, wins, losses)
+        return ranking
+
+    def _build_guild_ranking(self, guild_id):
+        ranking = RankingIndex()
+        for user_id, wins, losses, rating in self._conn.execute(
+            'SELECT user_id, wins, losses, rating FROM guild_stats WHERE guild_id = ?', (guild_id,)
+        ):
+            ranking.update(user_id, rating, wins, losses)
+        return ranking
+
+    def _close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    # --- Public async API ---
+
+    async def _run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    @property
+    def is_open(self) -> bool:
+        return self._conn is not None and not self._closed
+
+    @property
+    def queue_depth(self) -> int:
+        """Database calls waiting for the store's thread."""
+        return executor_queue_depth(self._executor)
+
+    async def open(self):
+        """Opens the store. Must be awaited before any other call."""
+        await self._run(self._open)
+        self.ranking = await self._run(self._build_ranking)
+        logger.info(f"Stats store opened at {self.path} with {len(self.ranking)} ranked players")
+        if self.sync_interval:
+            self._sync_task = asyncio.get_running_loop().create_task(self._sync_loop())
+        if self.retention is not None:
+            self._compact_task = asyncio.get_running_loop().create_task(self._compact_loop())
+
+    async def _sync_loop(self):
+        """Applies rows committed by other processes sharing this database."""
+        while True:
+            await asyncio.sleep(self.sync_interval)
+            try:
+                rows, guild_rows = await self._run(self._changes_since_last_sync)
+            except Exception as e:
+                logger.error(f"Stats sync failed: {e}", exc_info=True)
+                continue
+            if rows or guild_rows:
+                self._apply(rows, guild_rows)
+
+    async def _compact_loop(self):
+        """Periodically folds old events into the snapshot."""
+        while True:
+            await asyncio.sleep(self.compact_interval)
+            try:
+                await self.compact()
+            except Exception as e:
+                logger.error(f"Event log compaction failed: {e}", exc_info=True)
+
+    def add_listener(self, callback):
+        """Registers callback(rows, guild_rows) to be called on the event loop after every committed write.
+
+        rows is {user_id: row} of global totals; guild_rows is {guild_id: {user_id: row}}.
+        """
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        """Unregisters a callback added with add_listener, if present."""
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def _apply(self, rows, guild_rows):
+        for user_id, row in rows.items():
+            self.ranking.update(user_id, row['rating'], row['wins'], row['losses'])
+        for guild_id, partition in guild_rows.items():
+            # Guilds whose index is not built yet will read these rows when it is
+            ranking = self._guild_rankings.get(guild_id)
+            if ranking is not None:
+                for user_id, row in partition.items():
+                    ranking.update(user_id, row['rating'], row['wins'], row['losses'])
+        for callback in self._listeners:
+            try:
+                callback(rows, guild_rows)
+            except Exception as e:
+                logger.error(f"Stats listener {callback!r} failed: {e}", exc_info=True)
+
+    def loaded_guild_ranking(self, guild_id: int) -> RankingIndex | None:
+        """Returns a guild's ranking index if it is already built, without building it."""
+        return self._guild_rankings.get(guild_id)
+
+    async def guild_ranking(self, guild_id: int) -> RankingIndex:
+        """Returns the ranking index of one guild's partition, building it on first use."""
+        ranking = self._guild_rankings.get(guild_id)
+        if ranking is not None:
+            return ranking
+        future = self._guild_loading.get(guild_id)
+        if future is None:
+            future = asyncio.get_running_loop().run_in_executor(
+                self._executor, self._build_guild_ranking, guild_id
+            )
+            self._guild_loading[guild_id] = future
+
+            # Install from a done callback rather than after the await: it runs before
+            # any write queued behind the build can _apply, so no update is missed
+            def install(done):
+                self._guild_loading.pop(guild_id, None)
+                if not done.cancelled() and done.exception() is None:
+                    self._guild_rankings[guild_id] = done.result()
+
+            future.add_done_callback(install)
+        # This is the same object install() registers, even if it has not run yet
+        return await future
+
+    async def record_result(self, winner_id: int, loser_id: int, guild_id: int | None = None,
+                            source: str = 'duel'):
+        """Atomically records one duel result, in a guild's partition and the global totals."""
+        await self.record_results([(winner_id, loser_id)], guild_id, source)
+
+    async def record_results(self, results, guild_id: int | None = None, source: str = 'duel'):
+        """Atomically records many (winner_id, loser_id) results from one guild in one transaction.
+
+        Without a guild_id only the global totals are updated. source labels
+        the events in the log ('duel', 'tournament', 'simulated', ...).
+        """
+        results = list(results)
+        if results:
+            rows, guild_rows = await self._run(self._record_results, results, guild_id, source)
+            self._apply(rows, guild_rows)
+
+    async def compact(self, batch_size: int = 5000) -> int:
+        """Folds events older than the retention window into the snapshot. Returns how many were folded."""
+        if self.retention is None:
+            return 0
+        compacted = await self._run(self._compact, time.time() - self.retention, batch_size)
+        if compacted:
+            logger.info(f"Compacted {compacted} duel events into the stats snapshot")
+        return compacted
+
+    async def backfill_ratings(self, batch_size: int = 5000) -> int:
+        """Rebuilds every aggregate and rating from the snapshot plus the event log.
+
+        Returns the number of events replayed.
+        """
+        rows, replayed = await self._run(self._rebuild_from_log, batch_size)
+        # Every guild's rows were rewritten too; drop their indexes so they rebuild on next use
+        self._guild_rankings.clear()
+        self.generation += 1
+        self._apply(rows, {})
+        logger.info(f"Rebuilt stats for {len(rows)} players from the snapshot and {replayed} events")
+        return replayed
+
+    async def export_rows(self, kind: str, batch_size: int = 1000):
+        """Yields every row of an export kind, a page (list of tuples) at a time.
+
+        Columns follow EXPORT_COLUMNS[kind]. Pages are read by key in short
+        queries, so memory stays constant however large the store is and
+        duel writes are never held up behind a long read.
+        """
+        if kind not in EXPORT_COLUMNS:
+            raise ValueError(f"Unknown export {kind!r}")
+        key_length = len(_EXPORT_SOURCES[kind][1])
+        after = None
+        while True:
+            page = await self._run(self._export_page, kind, after, batch_size)
+            if not page:
+                return
+            yield page
+            after = page[-1][:key_length]
+
+    async def import_rows(self, kind: str, rows, batch_size: int = 1000) -> int:
+        """Bulk-loads rows in the EXPORT_COLUMNS[kind] layout, one transaction per batch.
+
+        'duels' appends the events (with new IDs) and applies them to the
+        aggregates and ratings like live results. 'snapshot' restores
+        exported snapshot rows and needs an empty store; importing a
+        snapshot and then the duel log recreates another deployment's
+        stats exactly. Returns the number of rows imported.
+        """
+        if kind not in IMPORT_KINDS:
+            raise ValueError(f"Cannot import {kind!r}; importable kinds are {', '.join(IMPORT_KINDS)}")
+        if kind == 'snapshot' and not await self._run(self._is_empty):
+            raise ValueError("A snapshot can only be imported into an empty stats store")
+
+        async def flush(batch):
+            if kind == 'duels':
+                events = [(winner_id, loser_id, guild_id, recorded_at, source)
+                          for _, winner_id, loser_id, guild_id, recorded_at, source in batch]
+                await self._run(self._write_events, events)
+            else:
+                await self._run(self._import_snapshot, batch)
+
+        imported = 0
+        batch = []
+        for row in rows:
+            batch.append(tuple(row))
+            if len(batch) >= batch_size:
+                await flush(batch)
+                imported += len(batch)
+                batch = []
+        if batch:
+            await flush(batch)
+            imported += len(batch)
+        # Too many rows changed to notify listeners one by one; rebuild the indexes instead
+        self.ranking = await self._run(self._build_ranking)
+        self._guild_rankings.clear()
+        self.generation += 1
+        logger.info(f"Imported {imported} {kind} rows into {self.path}")
+        return imported
+
+    async def get_player(self, user_id: int, guild_id: int | None = None) -> dict | None:
+        """Returns {'wins', 'losses', 'duels', 'rating'} for a player, or None if they never dueled.
+
+        With a guild_id the row comes from that guild's partition, otherwise from the global totals.
+        """
+        if guild_id is not None:
+            return await self._run(self._get_guild_player, guild_id, user_id)
+        return await self._run(self._get_player, user_id)
+
+    async def get_player_summary(self, user_id: int, guild_id: int) -> tuple[dict | None, dict | None]:
+        """Returns a player's (guild row, global row) in one round trip."""
+        return await self._run(self._get_player_summary, user_id, guild_id)
+
+    async def close(self):
+        """Closes the connection and shuts down the executor. Safe to call twice."""
+        if self._closed:
+            return
+        self._closed = True
+        for task in (self._sync_task, self._compact_task):
+            if task is not None:
+                task.cancel()
+        await self._run(self._close)
+        self._executor.shutdown(wait=True)
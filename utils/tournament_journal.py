@@ -0,0 +1,148 @@
+# utils/tournament_journal.py
+import asyncio
+import base64
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import config
+from utils.bracket import Bracket
+
+logger = logging.getLogger(__name__)
+
+
+class SavedTournament:
+    """A tournament recovered from its journal, ready to be resumed."""
+
+    __slots__ = ('guild_id', 'channel_id', 'simultaneous', 'bracket')
+
+    def __init__(self, guild_id: int, channel_id: int, simultaneous: bool, bracket: Bracket):
+        self.guild_id = guild_id
+        self.channel_id = channel_id
+        self.simultaneous = simultaneous
+        self.bracket = bracket
+
+
+class TournamentJournal:
+    """Append-only checkpoints for running tournaments, one file per guild.
+
+    A journal starts with a 'start' record holding the seeded bracket,
+    followed by one small 'result' line per decided match. Replaying the
+    results onto the bracket restores the tournament exactly where it
+    stopped. Appends are flushed to the OS but not fsynced, which survives a
+    process restart (the redeploy case) at the cost of a few microseconds per
+    match. The journal is deleted once the tournament finishes.
+
+    File I/O runs on a single-thread executor so appends stay in order.
+    """
+
+    def __init__(self, directory: str = config.TOURNAMENT_DIR):
+        self.directory = directory
+        self._files = {}  # Format: {guild_id: open file object} (executor thread only)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='tournament-journal')
+
+    def _path(self, guild_id):
+        return os.path.join(self.directory, f'{guild_id}.jsonl')
+
+    # --- Executor-side helpers (never call these from the event loop) ---
+
+    def _append(self, guild_id, records):
+        f = self._files.get(guild_id)
+        if f is None:
+            f = self._files[guild_id] = open(self._path(guild_id), 'a', encoding='utf-8')
+        f.write(''.join(json.dumps(record, separators=(',', ':')) + '\n' for record in records))
+        f.flush()
+
+    def _start(self, guild_id, channel_id, simultaneous, bracket_data):
+        os.makedirs(self.directory, exist_ok=True)
+        self._discard(guild_id)
+        record = {
+            'type': 'start', 'channel_id': channel_id, 'simultaneous': simultaneous,
+            'bracket': base64.b64encode(bracket_data).decode('ascii'),
+        }
+        self._append(guild_id, [record])
+        # The start record is written once per tournament, so make it durable
+        os.fsync(self._files[guild_id].fileno())
+
+    def _discard(self, guild_id):
+        f = self._files.pop(guild_id, None)
+        if f is not None:
+            f.close()
+        try:
+            os.remove(self._path(guild_id))
+        except FileNotFoundError:
+            pass
+
+    def _load(self, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            lines = f.read().split('\n')
+        start = json.loads(lines[0])
+        bracket = Bracket.from_bytes(base64.b64decode(start['bracket']))
+        for line in lines[1:]:
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A torn final line from a crash mid-write; that match is simply replayed
+                logger.warning(f"Ignoring truncated record in {path}")
+                break
+            bracket.record(record['round'], record['match'], record['winner'])
+        return start['channel_id'], start['simultaneous'], bracket
+
+    def _load_all(self):
+        saved = []
+        if not os.path.isdir(self.directory):
+            return saved
+        for filename in os.listdir(self.directory):
+            if not filename.endswith('.jsonl'):
+                continue
+            path = os.path.join(self.directory, filename)
+            try:
+                guild_id = int(filename[:-len('.jsonl')])
+                channel_id, simultaneous, bracket = self._load(path)
+            except Exception as e:
+                logger.error(f"Could not read tournament journal {path}: {e}", exc_info=True)
+                continue
+            saved.append(SavedTournament(guild_id, channel_id, simultaneous, bracket))
+        return saved
+
+    def _close(self):
+        for f in self._files.values():
+            f.close()
+        self._files.clear()
+
+    # --- Public async API ---
+
+    async def _run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    async def start(self, guild_id: int, channel_id: int, simultaneous: bool, bracket: Bracket):
+        """Begins a guild's journal with its freshly seeded bracket, replacing any old one."""
+        await self._run(self._start, guild_id, channel_id, simultaneous, bracket.to_bytes())
+
+    async def record(self, guild_id: int, round_num: int, results):
+        """Appends the (match_num, winner_id) results of one round in a single write."""
+        records = [
+            {'type': 'result', 'round': round_num, 'match': match_num, 'winner': winner_id}
+            for match_num, winner_id in results
+        ]
+        await self._run(self._append, guild_id, records)
+
+    async def finish(self, guild_id: int):
+        """Deletes a guild's journal once its tournament is over."""
+        await self._run(self._discard, guild_id)
+
+    async def load_all(self) -> list[SavedTournament]:
+        """Reads every unfinished tournament left on disk."""
+        return await self._run(self._load_all)
+
+    async def close(self):
+        """Closes open journal files and the executor. Safe to call twice."""
+        if self._executor is None:
+            return
+        await self._run(self._close)
+        self._executor.shutdown(wait=True)
+        self._executor = None